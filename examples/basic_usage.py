@@ -7,6 +7,7 @@
 
 import os
 import sys
+import glob
 import argparse
 from pathlib import Path
 
@@ -88,7 +89,7 @@ def parse_arguments():
     """Разбор аргументов командной строки"""
     parser = argparse.ArgumentParser(description="Примеры использования библиотеки PdfML")
     
-    parser.add_argument("pdf_path", help="Путь к PDF-файлу для анализа")
+    parser.add_argument("pdf_path", help="Путь к PDF-файлу для анализа или шаблон (например, 'docs/*.pdf')")
     parser.add_argument("--output", "-o", default="output", help="Директория для сохранения результатов")
     parser.add_argument("--mode", "-m", choices=["text", "tables", "full"], default="full",
                         help="Режим работы: text - только текст, tables - только таблицы, full - полный анализ")
@@ -101,8 +102,16 @@ def main():
     """Основная функция примера"""
     args = parse_arguments()
     
-    # Проверяем наличие файла
-    if not os.path.exists(args.pdf_path):
+    # Шаблон раскрывается в список файлов; модели загружаются один раз
+    # и переиспользуются для всех документов пакета. Существующий файл
+    # берется как есть: в его имени могут быть символы шаблона ("[", "*")
+    if os.path.exists(args.pdf_path):
+        pdf_paths = [args.pdf_path]
+    else:
+        pdf_paths = sorted(glob.glob(args.pdf_path))
+    
+    # Проверяем наличие файлов
+    if not pdf_paths:
         print(f"Ошибка: Файл {args.pdf_path} не найден")
         return 1
         
@@ -110,13 +119,14 @@ def main():
     os.makedirs(args.output, exist_ok=True)
     
     # Запускаем пример в соответствии с выбранным режимом
-    if args.mode == "text":
-        extract_text_example(args.pdf_path, args.output)
-    elif args.mode == "tables":
-        extract_tables_example(args.pdf_path, args.output)
-    elif args.mode == "full":
-        full_analysis_example(args.pdf_path, args.output)
-        
+    for pdf_path in pdf_paths:
+        if args.mode == "text":
+            extract_text_example(pdf_path, args.output)
+        elif args.mode == "tables":
+            extract_tables_example(pdf_path, args.output)
+        elif args.mode == "full":
+            full_analysis_example(pdf_path, args.output)
+            
     return 0
 
 
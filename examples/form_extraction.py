@@ -7,7 +7,6 @@
 
 import os
 import sys
-import json
 import argparse
 from pathlib import Path
 
@@ -15,6 +14,7 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
 
 from pdfml.models.form_extractor import FormExtractor
+from pdfml.utils.serialization import save_json, save_json_pages
 
 
 def extract_form_fields(pdf_path, output_dir):
@@ -48,8 +48,7 @@ def extract_form_fields(pdf_path, output_dir):
     os.makedirs(output_dir, exist_ok=True)
     output_file = os.path.join(output_dir, "form_fields.json")
     
-    with open(output_file, 'w', encoding='utf-8') as f:
-        json.dump(form_fields, f, ensure_ascii=False, indent=2)
+    save_json_pages(form_fields, output_file)
         
     print(f"\nРезультаты сохранены в {output_file}")
     
@@ -70,8 +69,7 @@ def extract_form_fields(pdf_path, output_dir):
         
         # Сохраняем результаты
         kv_file = os.path.join(output_dir, f"key_value_page_{page_num}.json")
-        with open(kv_file, 'w', encoding='utf-8') as f:
-            json.dump(key_value_pairs, f, ensure_ascii=False, indent=2)
+        save_json(key_value_pairs, kv_file, indent=True)
     
     print("\nИзвлечение полей завершено")
 
@@ -3,18 +3,19 @@
 """
 
 import os
-import json
+import functools
+from concurrent.futures import ThreadPoolExecutor, wait
 from datetime import datetime
 
 from ..core.pdf_processor import PDFProcessor
-from ..extractors.layout_extractor import LayoutExtractor
-from ..extractors.table_extractor import TableExtractor
-from ..extractors.entity_extractor import EntityExtractor
-from ..models.form_extractor import FormExtractor
 from ..utils.logger import get_logger
+from ..utils.serialization import save_json
 
 logger = get_logger(__name__)
 
+# Количество потоков для одновременного выполнения независимых этапов анализа
+ANALYSIS_STAGE_WORKERS = 3
+
 
 class PDFAnalyzer:
     """
@@ -22,7 +23,13 @@ class PDFAnalyzer:
     различных методов извлечения данных.
     """
     
-    def __init__(self, pdf_path, use_ocr=False, ocr_lang='rus+eng'):
+    __slots__ = (
+        "pdf_path", "use_ocr", "ocr_lang", "pdf_processor",
+        "_layout_extractor", "_table_extractor", "_entity_extractor", "_form_extractor",
+        "extracted_text", "layout_results", "table_results", "entity_results", "form_results"
+    )
+    
+    def __init__(self, pdf_path, use_ocr=False, ocr_lang='rus+eng', num_workers=None):
         """
         Инициализация анализатора PDF.
         
@@ -30,6 +37,8 @@ class PDFAnalyzer:
             pdf_path (str): Путь к PDF-файлу
             use_ocr (bool): Использовать ли OCR для извлечения текста
             ocr_lang (str): Языки для OCR (формат Tesseract)
+            num_workers (int): Количество процессов для извлечения текста.
+                               Если None, используется min(число ядер, 4).
         """
         self.pdf_path = pdf_path
         self.use_ocr = use_ocr
@@ -38,9 +47,10 @@ class PDFAnalyzer:
         logger.info(f"Инициализация анализатора для {pdf_path}")
         
         # Инициализируем процессор PDF
-        self.pdf_processor = PDFProcessor(pdf_path, use_ocr, ocr_lang)
+        self.pdf_processor = PDFProcessor(pdf_path, use_ocr, ocr_lang, num_workers)
         
-        # Другие экстракторы инициализируются по требованию
+        # Другие экстракторы инициализируются (и импортируются) по требованию
+        # и переиспользуются всеми экземплярами анализатора
         self._layout_extractor = None
         self._table_extractor = None
         self._entity_extractor = None
@@ -53,36 +63,68 @@ class PDFAnalyzer:
         self.entity_results = None
         self.form_results = None
         
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def _shared_layout_extractor():
+        """Общий для всех анализаторов экстрактор макета (модель загружается один раз)"""
+        logger.info("Инициализация экстрактора макета")
+        from ..extractors.layout_extractor import LayoutExtractor
+        
+        return LayoutExtractor()
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def _shared_table_extractor():
+        """Общий для всех анализаторов экстрактор таблиц"""
+        logger.info("Инициализация экстрактора таблиц")
+        from ..extractors.table_extractor import TableExtractor
+        
+        return TableExtractor()
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def _shared_entity_extractor():
+        """Общий для всех анализаторов экстрактор сущностей (модель загружается один раз)"""
+        logger.info("Инициализация экстрактора сущностей")
+        from ..extractors.entity_extractor import EntityExtractor
+        
+        return EntityExtractor()
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=1)
+    def _shared_form_extractor():
+        """Общий для всех анализаторов экстрактор форм (модель загружается один раз)"""
+        logger.info("Инициализация экстрактора форм")
+        from ..models.form_extractor import FormExtractor
+        
+        return FormExtractor()
+    
     @property
     def layout_extractor(self):
         """Ленивая инициализация экстрактора макета"""
         if self._layout_extractor is None:
-            logger.info("Инициализация экстрактора макета")
-            self._layout_extractor = LayoutExtractor()
+            self._layout_extractor = self._shared_layout_extractor()
         return self._layout_extractor
     
     @property
     def table_extractor(self):
         """Ленивая инициализация экстрактора таблиц"""
         if self._table_extractor is None:
-            logger.info("Инициализация экстрактора таблиц")
-            self._table_extractor = TableExtractor()
+            self._table_extractor = self._shared_table_extractor()
         return self._table_extractor
     
     @property
     def entity_extractor(self):
         """Ленивая инициализация экстрактора сущностей"""
         if self._entity_extractor is None:
-            logger.info("Инициализация экстрактора сущностей")
-            self._entity_extractor = EntityExtractor()
+            self._entity_extractor = self._shared_entity_extractor()
         return self._entity_extractor
     
     @property
     def form_extractor(self):
         """Ленивая инициализация экстрактора форм"""
         if self._form_extractor is None:
-            logger.info("Инициализация экстрактора форм")
-            self._form_extractor = FormExtractor()
+            self._form_extractor = self._shared_form_extractor()
         return self._form_extractor
     
     def extract_text(self, page_numbers=None):
@@ -100,33 +142,40 @@ class PDFAnalyzer:
         self.extracted_text = self.pdf_processor.extract_text(page_numbers)
         return self.extracted_text
     
-    def analyze_layout(self, page_numbers=None):
+    def analyze_layout(self, page_numbers=None, document=None):
         """
         Анализ макета страниц PDF.
         
         Args:
             page_numbers (list): Список номеров страниц для обработки.
                               Если None, обрабатываются все страницы.
+            document (fitz.Document): Документ, из которого читаются страницы.
+                              Если None, используется документ процессора.
                               
         Returns:
             dict: Словарь {номер_страницы: макет}
         """
         logger.info("Анализ макета PDF")
         
-        if not self.pdf_processor.document:
+        if document is None:
+            document = self.pdf_processor.document
+            
+        if not document:
             logger.error("PDF-документ не загружен")
             return {}
             
+        n_pages = len(document)
+        
         if page_numbers is None:
-            page_numbers = range(len(self.pdf_processor.document))
+            page_numbers = range(n_pages)
             
         result = {}
         for page_num in page_numbers:
-            if page_num >= len(self.pdf_processor.document):
+            if page_num >= n_pages:
                 logger.warning(f"Страница {page_num} не существует")
                 continue
                 
-            page = self.pdf_processor.document[page_num]
+            page = document[page_num]
             layout = self.layout_extractor.extract_layout(page)
             result[page_num] = layout
             
@@ -146,6 +195,8 @@ class PDFAnalyzer:
         """
         logger.info("Извлечение таблиц из PDF")
         
+        # Camelot принимает только путь к файлу, поэтому ему передается
+        # исходный PDF: временная копия не избавила бы от повторного разбора.
         # Если макет не был проанализирован, извлекаем таблицы напрямую
         if not self.layout_results:
             if page_numbers is None:
@@ -160,19 +211,20 @@ class PDFAnalyzer:
             return self.table_results
         
         # Если макет был проанализирован, используем информацию о расположении таблиц
+        import numpy as np
+        
+        page_set = set(page_numbers) if page_numbers is not None else None
         table_regions = {}
         for page_num, layout in self.layout_results.items():
-            if page_numbers is not None and page_num not in page_numbers:
+            if page_set is not None and page_num not in page_set:
                 continue
                 
             if layout["tables"]:
-                table_regions[page_num] = []
-                for table in layout["tables"]:
-                    coords = table["coords"]
-                    # Формат для camelot: [x1, y1, x2, y2]
-                    table_regions[page_num].append([
-                        coords["x1"], coords["y1"], coords["x2"], coords["y2"]
-                    ])
+                # Массив формы (число_таблиц, 4), строки в формате [x1, y1, x2, y2]
+                table_regions[page_num] = np.asarray([
+                    [coords["x1"], coords["y1"], coords["x2"], coords["y2"]]
+                    for coords in (table["coords"] for table in layout["tables"])
+                ], dtype=np.float32)
         
         if table_regions:
             self.table_results = self.table_extractor.extract_tables_from_regions(
@@ -205,29 +257,37 @@ class PDFAnalyzer:
         if self.extracted_text is None:
             text_dict = {}
         elif page_numbers is not None:
+            page_set = set(page_numbers)
             text_dict = {page: text for page, text in self.extracted_text.items() 
-                        if page in page_numbers}
+                        if page in page_set}
         else:
             text_dict = self.extracted_text
             
         self.entity_results = self.entity_extractor.extract_entities_from_pdf_text(text_dict)
         return self.entity_results
     
-    def extract_form_fields(self, page_numbers=None):
+    def extract_form_fields(self, page_numbers=None, document=None):
         """
         Извлечение полей формы из PDF.
         
         Args:
             page_numbers (list): Список номеров страниц для обработки.
                               Если None, обрабатываются все страницы.
+            document (fitz.Document): Документ, из которого читаются страницы.
+                              Если None, используется документ процессора.
                               
         Returns:
             dict: Словарь {номер_страницы: список_полей}
         """
         logger.info("Извлечение полей формы из PDF")
+        
+        if document is None:
+            document = self.pdf_processor.document
+            
         self.form_results = self.form_extractor.extract_form_fields(
             self.pdf_path, 
-            page_numbers
+            page_numbers,
+            document=document
         )
         return self.form_results
     
@@ -244,11 +304,39 @@ class PDFAnalyzer:
         """
         logger.info("Запуск полного анализа PDF")
         
-        self.extract_text(page_numbers)
-        self.analyze_layout(page_numbers)
-        self.extract_tables(page_numbers)
-        self.extract_entities(page_numbers)
-        self.extract_form_fields(page_numbers)
+        with ThreadPoolExecutor(max_workers=ANALYSIS_STAGE_WORKERS) as executor:
+            # Текст, макет и поля формы не зависят друг от друга.
+            # Макет и формы читаются через отдельные дескрипторы, чтобы потоки
+            # хотя бы не делили один объект документа. Это не делает работу
+            # безопасной: PyMuPDF официально не поддерживает многопоточность
+            # даже для разных документов. Основное время этапов уходит
+            # на модели, но при сбоях в PyMuPDF стоит вызывать этапы по очереди.
+            layout_document = self.pdf_processor.open_copy()
+            form_document = self.pdf_processor.open_copy()
+            try:
+                stages = [
+                    executor.submit(self.extract_text, page_numbers),
+                    executor.submit(self.analyze_layout, page_numbers, layout_document),
+                    executor.submit(self.extract_form_fields, page_numbers, form_document)
+                ]
+                # Документы закрываются только после завершения всех этапов,
+                # даже если один из них упал: остальные еще читают страницы
+                wait(stages)
+            finally:
+                layout_document.close()
+                form_document.close()
+                
+            for stage in stages:
+                stage.result()
+                
+            # Таблицы зависят от макета, сущности - от текста
+            stages = [
+                executor.submit(self.extract_tables, page_numbers),
+                executor.submit(self.extract_entities, page_numbers)
+            ]
+            wait(stages)
+            for stage in stages:
+                stage.result()
         
         return {
             "text": self.extracted_text,
@@ -282,26 +370,22 @@ class PDFAnalyzer:
         # Сохраняем извлеченный текст
         if self.extracted_text:
             text_file = os.path.join(result_dir, "extracted_text.json")
-            with open(text_file, 'w', encoding='utf-8') as f:
-                json.dump(self.extracted_text, f, ensure_ascii=False, indent=2)
+            save_json(self.extracted_text, text_file)
         
         # Сохраняем результаты анализа макета
         if self.layout_results:
             layout_file = os.path.join(result_dir, "layout_results.json")
-            with open(layout_file, 'w', encoding='utf-8') as f:
-                json.dump(self.layout_results, f, ensure_ascii=False, indent=2)
+            save_json(self.layout_results, layout_file)
         
         # Сохраняем именованные сущности
         if self.entity_results:
             entities_file = os.path.join(result_dir, "entity_results.json")
-            with open(entities_file, 'w', encoding='utf-8') as f:
-                json.dump(self.entity_results, f, ensure_ascii=False, indent=2)
+            save_json(self.entity_results, entities_file)
         
         # Сохраняем поля формы
         if self.form_results:
             forms_file = os.path.join(result_dir, "form_results.json")
-            with open(forms_file, 'w', encoding='utf-8') as f:
-                json.dump(self.form_results, f, ensure_ascii=False, indent=2)
+            save_json(self.form_results, forms_file)
         
         # Сохраняем таблицы в CSV-файлы
         if self.table_results and save_tables:
@@ -3,16 +3,137 @@
 """
 
 import os
+import re
+import queue
+import functools
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import fitz  # PyMuPDF
-from PIL import Image
-import numpy as np
-import pytesseract
-from pdf2image.pdf2image import convert_from_path
 
 from ..utils.logger import get_logger
+from ..utils.parallel import get_mp_context
 
 logger = get_logger(__name__)
 
+# Минимальное число страниц, начиная с которого текст извлекается в пуле
+# процессов: на меньших документах запуск процессов дороже самой работы
+PARALLEL_MIN_PAGES = 64
+
+# Максимальное число растеризованных страниц, одновременно хранящихся в памяти при OCR
+OCR_BATCH_SIZE = 16
+
+# Параметры Tesseract: движок LSTM, автоматическая сегментация страницы
+TESSERACT_CONFIG = "--oem 1 --psm 3"
+
+# Перенос слова по дефису в конце строки и повторяющиеся пробелы в выводе OCR
+_HYPHENATION_RE = re.compile(r"-\n(?=\w)")
+_SPACES_RE = re.compile(r"[ \t]{2,}")
+
+# Документы, открытые в рабочих процессах (по одному на файл)
+_worker_documents = {}
+
+
+@functools.lru_cache(maxsize=None)
+def _import_tesserocr():
+    """
+    Отложенный импорт tesserocr.
+    
+    Returns:
+        module: Модуль tesserocr или None, если он не установлен
+    """
+    try:
+        import tesserocr
+    except ImportError:
+        return None
+    return tesserocr
+
+
+def _default_num_workers():
+    """Количество рабочих процессов по умолчанию"""
+    return min(os.cpu_count() or 1, 4)
+
+
+def _page_text(document, page_num):
+    """
+    Извлечение текстового слоя одной страницы открытого документа.
+    
+    Args:
+        document (fitz.Document): Открытый PDF-документ
+        page_num (int): Номер страницы
+        
+    Returns:
+        str: Извлеченный текст
+    """
+    return document[page_num].get_text("text")
+
+
+def _is_blank(text):
+    """
+    Проверка, что текст пуст или состоит только из пробельных символов.
+    
+    В отличие от text.strip() не создает копию строки и завершается
+    на первом непробельном символе.
+    
+    Args:
+        text (str): Текст страницы
+        
+    Returns:
+        bool: True, если текста нет
+    """
+    return not text or text.isspace()
+
+
+def _clean_ocr_text(text):
+    """
+    Очистка текста, распознанного OCR.
+    
+    Склеивает слова, перенесенные по дефису, заменяет переводы строк
+    Windows на Unix и схлопывает повторяющиеся пробелы и табуляции.
+    
+    Args:
+        text (str): Распознанный текст
+        
+    Returns:
+        str: Очищенный текст
+    """
+    text = text.replace("\r\n", "\n")
+    text = _HYPHENATION_RE.sub("", text)
+    return _SPACES_RE.sub(" ", text)
+
+
+def _init_worker(pdf_path):
+    """
+    Инициализация рабочего процесса: документ открывается один раз
+    и переиспользуется для всех страниц, обработанных процессом.
+    
+    Args:
+        pdf_path (str): Путь к PDF-файлу
+    """
+    _worker_documents[pdf_path] = fitz.Document(pdf_path)
+
+
+def _extract_page_text(pdf_path, page_num):
+    """
+    Извлечение текста страницы в рабочем процессе.
+    
+    Объекты fitz не сериализуются, поэтому каждый процесс открывает
+    документ самостоятельно и переиспользует его для следующих страниц.
+    
+    Args:
+        pdf_path (str): Путь к PDF-файлу
+        page_num (int): Номер страницы
+        
+    Returns:
+        tuple: (номер_страницы, текст)
+    """
+    document = _worker_documents.get(pdf_path)
+    if document is None:
+        document = fitz.Document(pdf_path)
+        _worker_documents[pdf_path] = document
+        
+    return page_num, _page_text(document, page_num)
+
 
 class PDFProcessor:
     """
@@ -20,7 +141,12 @@ class PDFProcessor:
     Поддерживает извлечение текста из обычных и отсканированных PDF-документов.
     """
     
-    def __init__(self, pdf_path, use_ocr=False, ocr_lang='rus+eng'):
+    __slots__ = (
+        "pdf_path", "use_ocr", "ocr_lang", "num_workers",
+        "document", "_tess_apis", "_executor", "_parallel_failed"
+    )
+    
+    def __init__(self, pdf_path, use_ocr=False, ocr_lang='rus+eng', num_workers=None):
         """
         Инициализация обработчика PDF.
         
@@ -28,12 +154,24 @@ class PDFProcessor:
             pdf_path (str): Путь к PDF-файлу
             use_ocr (bool): Использовать ли OCR для извлечения текста
             ocr_lang (str): Языки для OCR (формат Tesseract)
+            num_workers (int): Количество процессов для извлечения текста
+                               документов от PARALLEL_MIN_PAGES страниц.
+                               Если None, используется min(число ядер, 4).
         """
         self.pdf_path = pdf_path
         self.use_ocr = use_ocr
         self.ocr_lang = ocr_lang
+        self.num_workers = num_workers if num_workers is not None else _default_num_workers()
         self.document = None
         
+        # Свободные экземпляры libtesseract (если установлен tesserocr)
+        self._tess_apis = queue.SimpleQueue()
+        
+        # Пул процессов создается при первом параллельном извлечении
+        # и переиспользуется до закрытия обработчика
+        self._executor = None
+        self._parallel_failed = False
+        
         if not os.path.exists(pdf_path):
             raise FileNotFoundError(f"PDF файл не найден: {pdf_path}")
             
@@ -43,7 +181,7 @@ class PDFProcessor:
         except Exception as e:
             logger.error(f"Ошибка при открытии PDF: {e}")
             raise
-            
+    
     def extract_text(self, page_numbers=None) -> dict[int, str]:
         """
         Извлечение текста из PDF.
@@ -51,74 +189,241 @@ class PDFProcessor:
         Args:
             page_numbers (list): Список номеров страниц для обработки.
                                 Если None, обрабатываются все страницы.
-        
+                                
         Returns:
             dict: Словарь {номер_страницы: текст}
         """
         if self.document is None:
             logger.error("PDF-документ не загружен")
             return {}
+            
+        document = self.document
+        n_pages = len(document)
         
         if page_numbers is None:
-            page_numbers = range(len(self.document))
+            page_numbers = range(n_pages)
             
-        result = {}
-        
+        valid_pages = []
         for page_num in page_numbers:
-            if page_num >= len(self.document):
+            if page_num >= n_pages:
                 logger.warning(f"Страница {page_num} не существует")
                 continue
-                
-            page = self.document[page_num]
+            valid_pages.append(page_num)
             
-            if self.use_ocr:
-                text = self._extract_text_with_ocr(page_num)
-            else:
-                text = page.get_textpage().extractText()
+        if self.use_ocr:
+            result = dict.fromkeys(valid_pages, "")
+            ocr_pages = valid_pages
+        else:
+            result = None
+            if (self.num_workers > 1 and not self._parallel_failed
+                    and len(valid_pages) >= PARALLEL_MIN_PAGES):
+                result = self._extract_text_parallel(valid_pages)
+            if result is None:
+                result = {page_num: _page_text(document, page_num) for page_num in valid_pages}
                 
-            if not text.strip() and not self.use_ocr:
-                # Если извлечь текст не удалось, попробуем OCR
+            # Страницы без текстового слоя отправляем на OCR
+            ocr_pages = [page_num for page_num in valid_pages if _is_blank(result[page_num])]
+            for page_num in ocr_pages:
                 logger.info(f"Страница {page_num} не содержит текста, пробуем OCR")
-                text = self._extract_text_with_ocr(page_num)
                 
-            result[page_num] = text
+        if ocr_pages:
+            result.update(self._extract_text_with_ocr_batch(ocr_pages))
             
         return result
     
-    def _extract_text_with_ocr(self, page_num):
+    def _extract_text_parallel(self, page_numbers):
         """
-        Извлечение текста с использованием OCR.
+        Параллельное извлечение текста в пуле процессов.
+        
+        Одновременно в работе находится не более 2 * num_workers страниц,
+        чтобы не накапливать в памяти результаты всего документа.
+        Если пул не удалось запустить или рабочий процесс завершился
+        аварийно (например, вызывающий скрипт не защищен проверкой
+        __name__ == "__main__"), обработчик переходит на извлечение
+        в текущем процессе.
+        
+        Args:
+            page_numbers (list): Список существующих номеров страниц
+            
+        Returns:
+            dict: Словарь {номер_страницы: текст} или None в случае ошибки пула
+        """
+        result = {}
+        max_pending = 2 * self.num_workers
+        pending = deque()
+        
+        logger.info(f"Извлечение текста в {self.num_workers} процессах")
+        
+        try:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.num_workers,
+                    mp_context=get_mp_context(),
+                    initializer=_init_worker,
+                    initargs=(self.pdf_path,)
+                )
+            executor = self._executor
+            
+            for page_num in page_numbers:
+                pending.append(executor.submit(_extract_page_text, self.pdf_path, page_num))
+                if len(pending) >= max_pending:
+                    page, text = pending.popleft().result()
+                    result[page] = text
+                    
+            while pending:
+                page, text = pending.popleft().result()
+                result[page] = text
+        except (BrokenProcessPool, OSError) as e:
+            logger.warning(f"Пул процессов недоступен, извлекаем текст в текущем процессе: {e}")
+            for future in pending:
+                future.cancel()
+            self._shutdown_executor()
+            self._parallel_failed = True
+            return None
+            
+        return result
+    
+    def _shutdown_executor(self):
+        """Остановка пула процессов извлечения текста"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+    
+    def _rasterize_page(self, page_num, dpi=300):
+        """
+        Конвертация страницы в изображение средствами PyMuPDF.
         
         Args:
             page_num (int): Номер страницы
+            dpi (int): Разрешение растеризации
             
         Returns:
-            str: Извлеченный текст
+            PIL.Image: Изображение страницы или None в случае ошибки
         """
-        # Конвертируем страницу в изображение
-        pil_images = convert_from_path(
-            self.pdf_path, 
-            first_page=page_num+1, 
-            last_page=page_num+1,
-            dpi=300
-        )
+        from PIL import Image
         
-        if not pil_images:
-            logger.error(f"Не удалось конвертировать страницу {page_num} в изображение")
-            return ""
+        try:
+            pix = self.document[page_num].get_pixmap(matrix=fitz.Matrix(dpi/72, dpi/72), alpha=False)
+            return Image.frombytes("RGB", (pix.width, pix.height), pix.samples)
+        except Exception as e:
+            logger.error(f"Не удалось конвертировать страницу {page_num} в изображение: {e}")
+            return None
+    
+    def _acquire_tess_api(self):
+        """
+        Получение свободного экземпляра libtesseract.
         
-        img = pil_images[0]
+        Экземпляр не потокобезопасен, поэтому каждый поток берет свой
+        и возвращает его в очередь после распознавания.
         
-        # Применяем OCR
+        Returns:
+            tesserocr.PyTessBaseAPI: Инициализированный экземпляр
+        """
         try:
-            text = pytesseract.image_to_string(img, lang=self.ocr_lang)
-            return text
+            return self._tess_apis.get_nowait()
+        except queue.Empty:
+            tesserocr = _import_tesserocr()
+            return tesserocr.PyTessBaseAPI(
+                lang=self.ocr_lang,
+                oem=tesserocr.OEM.LSTM_ONLY,
+                psm=tesserocr.PSM.AUTO
+            )
+    
+    def _ocr_image(self, img):
+        """
+        Распознавание текста на изображении страницы.
+        
+        При наличии tesserocr используется libtesseract внутри процесса,
+        иначе pytesseract с запуском отдельного процесса tesseract.
+        
+        Args:
+            img (PIL.Image): Изображение страницы
+            
+        Returns:
+            str: Распознанный текст
+        """
+        try:
+            if _import_tesserocr() is not None:
+                api = self._acquire_tess_api()
+                try:
+                    api.SetImage(img)
+                    return _clean_ocr_text(api.GetUTF8Text())
+                finally:
+                    self._tess_apis.put(api)
+                    
+            import pytesseract
+            
+            text = pytesseract.image_to_string(img, lang=self.ocr_lang, config=TESSERACT_CONFIG)
+            return _clean_ocr_text(text)
         except Exception as e:
             logger.error(f"Ошибка OCR: {e}")
             return ""
     
+    def _extract_text_with_ocr_batch(self, page_numbers):
+        """
+        Извлечение текста нескольких страниц с использованием OCR.
+        
+        Страницы растеризуются в текущем потоке пачками по OCR_BATCH_SIZE,
+        а распознавание выполняется в пуле потоков: и tesserocr, и pytesseract
+        освобождают GIL на время работы tesseract.
+        
+        Args:
+            page_numbers (list): Список номеров страниц
+            
+        Returns:
+            dict: Словарь {номер_страницы: текст}
+        """
+        result = {}
+        
+        with ThreadPoolExecutor(max_workers=max(self.num_workers, 1)) as executor:
+            for start in range(0, len(page_numbers), OCR_BATCH_SIZE):
+                batch = page_numbers[start:start + OCR_BATCH_SIZE]
+                images = {page_num: self._rasterize_page(page_num) for page_num in batch}
+                
+                for page_num in batch:
+                    if images[page_num] is None:
+                        result[page_num] = ""
+                        
+                pages = [page_num for page_num in batch if images[page_num] is not None]
+                texts = executor.map(self._ocr_image, [images[page_num] for page_num in pages])
+                result.update(zip(pages, texts))
+                
+        return result
+    
+    def _extract_text_with_ocr(self, page_num):
+        """
+        Извлечение текста с использованием OCR.
+        
+        Args:
+            page_num (int): Номер страницы
+            
+        Returns:
+            str: Извлеченный текст
+        """
+        return self._extract_text_with_ocr_batch([page_num])[page_num]
+    
+    def open_copy(self):
+        """
+        Открытие отдельного дескриптора того же PDF-документа.
+        
+        Нужен, когда страницы документа читаются одновременно с self.document
+        (например, в соседнем потоке). Закрывать его должен вызывающий код.
+        
+        Returns:
+            fitz.Document: Новый дескриптор документа
+        """
+        return fitz.Document(self.pdf_path)
+    
     def close(self):
         """Закрытие документа и освобождение ресурсов"""
+        self._shutdown_executor()
+        
+        while True:
+            try:
+                self._tess_apis.get_nowait().End()
+            except queue.Empty:
+                break
+                
         if self.document:
             self.document.close()
             logger.info("PDF-документ закрыт")
@@ -8,12 +8,23 @@ from spacy.tokens import Doc
 from spacy.language import Language
 from transformers import pipeline, AutoTokenizer, AutoModelForTokenClassification
 import re
-from typing import List, Dict, Any, Optional, Union, cast
+import hashlib
+from collections import OrderedDict, deque
+from typing import List, Dict, Any, Optional, Union
 
 from ..utils.logger import get_logger
 
 logger = get_logger(__name__)
 
+# Максимальное число текстов, результаты для которых хранятся в кэше
+ENTITY_CACHE_SIZE = 10_000
+
+# Число символов в начале текста, по которым оценивается доля букв
+ALPHA_SAMPLE_SIZE = 2000
+
+# Граница предложений: пробельные символы после конечного знака препинания
+_SENTENCE_BREAK_RE = re.compile(r'(?<=[.!?])\s+')
+
 
 class EntityExtractor:
     """
@@ -21,7 +32,8 @@ class EntityExtractor:
     из текста PDF-документов.
     """
     
-    def __init__(self, model_type="spacy", model_name="ru_core_news_lg"):
+    def __init__(self, model_type="spacy", model_name="ru_core_news_lg", batch_size=32, n_process=1,
+                 enable_cache=True, min_length=20, min_alpha_ratio=0.3):
         """
         Инициализация экстрактора сущностей.
         
@@ -29,11 +41,31 @@ class EntityExtractor:
             model_type (str): Тип модели для распознавания сущностей.
                 Поддерживаемые значения: "spacy", "transformers"
             model_name (str): Имя модели для загрузки
+            batch_size (int): Размер пакета: страниц для nlp.pipe (SpaCy)
+                или предложений для одного прохода модели (Transformers)
+            n_process (int): Количество процессов nlp.pipe (SpaCy)
+            enable_cache (bool): Кэшировать ли сущности для повторяющихся текстов
+                (колонтитулы, типовые страницы, одинаковые документы)
+            min_length (int): Минимальная длина текста, передаваемого модели
+            min_alpha_ratio (float): Минимальная доля букв в тексте. Тексты,
+                состоящие в основном из цифр и знаков (номера страниц,
+                числовые таблицы), модели не передаются
         """
         self.model_type = model_type
         self.model_name = model_name
+        self.batch_size = batch_size
+        self.n_process = n_process
+        self.min_length = min_length
+        self.min_alpha_ratio = min_alpha_ratio
         self.model = self._load_model(model_type, model_name)
         
+        # Кэш описаний меток SpaCy: меток немного, а сущностей на странице много
+        self._label_desc = {}
+        
+        # Кэш сущностей по хэшу текста, вытеснение давно не использованных
+        self.enable_cache = enable_cache
+        self._cache = OrderedDict()
+        
     def _load_model(self, model_type, model_name):
         """
         Загрузка модели для распознавания сущностей.
@@ -54,7 +86,7 @@ class EntityExtractor:
             elif model_type == "transformers":
                 tokenizer = AutoTokenizer.from_pretrained(model_name)
                 model = AutoModelForTokenClassification.from_pretrained(model_name)
-                nlp = pipeline("ner", model=model, tokenizer=tokenizer)
+                nlp = pipeline("ner", model=model, tokenizer=tokenizer, batch_size=self.batch_size)
                 logger.info(f"Загружена модель Transformers: {model_name}")
                 return nlp
             else:
@@ -76,17 +108,96 @@ class EntityExtractor:
         if not text or len(text.strip()) == 0:
             return []
             
+        if not self._has_enough_letters(text):
+            logger.info(f"Текст из {len(text)} символов пропущен: слишком короткий или мало букв")
+            return []
+            
+        key = self._cache_key(text)
+        entities = self._cache_get(key)
+        if entities is not None:
+            return entities
+            
         try:
             if self.model_type == "spacy":
-                return self._extract_with_spacy(text)
+                entities = self._extract_with_spacy(text)
             elif self.model_type == "transformers":
-                return self._extract_with_transformers(text)
+                entities = self._extract_with_transformers(text)
             else:
                 logger.error(f"Неподдерживаемый тип модели: {self.model_type}")
                 return []
         except Exception as e:
             logger.error(f"Ошибка при извлечении сущностей: {e}")
             return []
+            
+        self._cache_put(key, entities)
+        return entities
+    
+    def _has_enough_letters(self, text):
+        """
+        Быстрая проверка, есть ли смысл передавать текст модели.
+        
+        Args:
+            text (str): Текст для анализа
+            
+        Returns:
+            bool: True, если текст достаточно длинный и содержит достаточно букв
+        """
+        text = text.strip()
+        if len(text) < self.min_length:
+            return False
+            
+        sample = text[:ALPHA_SAMPLE_SIZE]
+        return sum(map(str.isalpha, sample)) >= self.min_alpha_ratio * len(sample)
+    
+    @staticmethod
+    def _cache_key(text):
+        """
+        Ключ кэша для текста.
+        
+        Args:
+            text (str): Текст для анализа
+            
+        Returns:
+            bytes: 16-байтовый хэш BLAKE2b
+        """
+        return hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+    
+    def _cache_get(self, key):
+        """
+        Получение сущностей из кэша.
+        
+        Args:
+            key (bytes): Ключ кэша
+            
+        Returns:
+            list: Копия списка сущностей или None, если текста нет в кэше
+        """
+        if not self.enable_cache:
+            return None
+            
+        entities = self._cache.get(key)
+        if entities is None:
+            return None
+            
+        self._cache.move_to_end(key)
+        # Вызывающий код может изменять сущности, поэтому отдаем копии
+        return [dict(entity) for entity in entities]
+    
+    def _cache_put(self, key, entities):
+        """
+        Сохранение сущностей в кэш.
+        
+        Args:
+            key (bytes): Ключ кэша
+            entities (list): Список сущностей
+        """
+        if not self.enable_cache:
+            return
+            
+        self._cache[key] = [dict(entity) for entity in entities]
+        self._cache.move_to_end(key)
+        if len(self._cache) > ENTITY_CACHE_SIZE:
+            self._cache.popitem(last=False)
     
     def _extract_with_spacy(self, text: str) -> List[Dict[str, Any]]:
         """
@@ -98,22 +209,35 @@ class EntityExtractor:
         Returns:
             list: Список сущностей
         """
-        doc = cast(Doc, self.model(text))
-        entities = []
+        return self._format_spacy_entities(self.model(text))
+    
+    def _format_spacy_entities(self, doc: Doc) -> List[Dict[str, Any]]:
+        """
+        Форматирование сущностей документа SpaCy.
         
-        for ent in doc.ents:
-            # Создаём словарь с информацией о сущности
-            entity = {
+        Args:
+            doc (Doc): Обработанный документ SpaCy
+            
+        Returns:
+            list: Список сущностей
+        """
+        ents = doc.ents
+        label_desc = self._label_desc
+        for ent in ents:
+            if ent.label_ not in label_desc:
+                label_desc[ent.label_] = explain(ent.label_)
+                
+        # Создаём словарь с информацией о каждой сущности
+        return [
+            {
                 "text": ent.text,
                 "label": ent.label_,
                 "start_char": ent.start_char,
                 "end_char": ent.end_char,
-                "description": spacy.glossary.explain(ent.label_)
+                "description": label_desc[ent.label_]
             }
-            
-            entities.append(entity)
-            
-        return entities
+            for ent in ents
+        ]
     
     def _extract_with_transformers(self, text):
         """
@@ -127,32 +251,33 @@ class EntityExtractor:
         """
         # Transformers может иметь ограничение на длину текста,
         # поэтому разбиваем на части, если текст длинный
-        max_length = 512
+        tokenizer = self.model.tokenizer
+        max_length = min(tokenizer.model_max_length, 512)
         
-        if len(text) <= max_length:
-            result = self.model(text)
-            return self._format_transformer_results(result, text)
+        if len(tokenizer(text)["input_ids"]) <= max_length:
+            sentences = [text]
+            offsets = [0]
         else:
-            # Разбиваем текст на части по предложениям
-            sentences = re.split(r'(?<=[.!?])\s+', text)
-            
-            entities = []
-            offset = 0
-            
-            for sentence in sentences:
-                if len(sentence) == 0:
-                    continue
-                    
-                result = self.model(sentence)
-                
-                # Корректируем смещение
-                formatted_entities = self._format_transformer_results(result, sentence, offset)
-                entities.extend(formatted_entities)
+            # Разбиваем текст на части по предложениям, запоминая
+            # смещение каждого предложения в исходном тексте
+            sentences = []
+            offsets = []
+            start = 0
+            for match in _SENTENCE_BREAK_RE.finditer(text):
+                if match.start() > start:
+                    sentences.append(text[start:match.start()])
+                    offsets.append(start)
+                start = match.end()
+            if start < len(text):
+                sentences.append(text[start:])
+                offsets.append(start)
                 
-                # Обновляем смещение для следующего предложения
-                offset += len(sentence) + 1  # +1 для пробела между предложениями
-                
-            return entities
+        # Все предложения обрабатываются одним пакетным вызовом модели
+        entities = []
+        for sentence, offset, result in zip(sentences, offsets, self.model(sentences)):
+            entities.extend(self._format_transformer_results(result, sentence, offset))
+            
+        return entities
     
     def _format_transformer_results(self, results, text, offset=0):
         """
@@ -203,10 +328,90 @@ class EntityExtractor:
         Returns:
             dict: Словарь {номер_страницы: список_сущностей}
         """
-        result = {}
+        return dict(self.iter_entities_from_pdf_text(pdf_text_dict))
+    
+    def iter_entities_from_pdf_text(self, pdf_text_dict):
+        """
+        Постраничное извлечение сущностей из текста PDF.
+        
+        Результаты возвращаются по мере готовности в порядке страниц,
+        поэтому их можно обрабатывать, не храня сущности всего документа.
         
+        Args:
+            pdf_text_dict (dict): Словарь {номер_страницы: текст}
+            
+        Yields:
+            tuple: (номер_страницы, список_сущностей)
+        """
+        if self.model_type == "spacy":
+            yield from self._iter_from_pages_with_spacy(pdf_text_dict)
+            return
+            
         for page_num, text in pdf_text_dict.items():
-            entities = self.extract_entities(text)
-            result[page_num] = entities
+            yield page_num, self.extract_entities(text)
+    
+    def _iter_from_pages_with_spacy(self, pdf_text_dict):
+        """
+        Пакетное извлечение сущностей SpaCy из страниц через nlp.pipe.
+        
+        Args:
+            pdf_text_dict (dict): Словарь {номер_страницы: текст}
             
-        return result 
\ No newline at end of file
+        Yields:
+            tuple: (номер_страницы, список_сущностей)
+        """
+        # Страницы в исходном порядке: [номер_страницы, сущности или None]
+        entries = deque()
+        # Страницы, ожидающие результата модели для текста с данным ключом
+        waiting = {}
+        yielded = set()
+        
+        def texts():
+            # Пустые страницы и страницы почти без букв в модель не передаются,
+            # а одинаковые тексты и тексты из кэша обрабатываются не более одного раза
+            for page_num, text in pdf_text_dict.items():
+                entry = [page_num, None]
+                entries.append(entry)
+                
+                if not text or not text.strip():
+                    entry[1] = []
+                    continue
+                    
+                if not self._has_enough_letters(text):
+                    logger.info(f"Страница {page_num} пропущена: слишком короткий текст или мало букв")
+                    entry[1] = []
+                    continue
+                    
+                key = self._cache_key(text)
+                entities = self._cache_get(key)
+                if entities is not None:
+                    entry[1] = entities
+                elif key in waiting:
+                    waiting[key].append(entry)
+                else:
+                    waiting[key] = [entry]
+                    yield text, key
+                    
+        def ready():
+            # Отдаем готовые страницы, не нарушая порядок
+            while entries and entries[0][1] is not None:
+                page_num, entities = entries.popleft()
+                yielded.add(page_num)
+                yield page_num, entities
+                
+        try:
+            docs = self.model.pipe(texts(), as_tuples=True, batch_size=self.batch_size, n_process=self.n_process)
+            for doc, key in docs:
+                entities = self._format_spacy_entities(doc)
+                self._cache_put(key, entities)
+                for entry in waiting.pop(key):
+                    entry[1] = [dict(entity) for entity in entities]
+                yield from ready()
+                
+            yield from ready()
+        except Exception as e:
+            logger.error(f"Ошибка при пакетном извлечении сущностей: {e}")
+            # Обрабатываем оставшиеся страницы по одной
+            for page_num, text in pdf_text_dict.items():
+                if page_num not in yielded:
+                    yield page_num, self.extract_entities(text) 
\ No newline at end of file
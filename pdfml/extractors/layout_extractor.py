@@ -13,6 +13,15 @@ from ..utils.visualization import visualize_layout
 
 logger = get_logger(__name__)
 
+# Категория результата для каждого типа блока макета
+_BLOCK_CATEGORIES = {
+    "Text": "text_blocks",
+    "Title": "titles",
+    "List": "lists",
+    "Table": "tables",
+    "Figure": "figures"
+}
+
 
 class LayoutExtractor:
     """
@@ -20,15 +29,25 @@ class LayoutExtractor:
     структурированных элементов (текст, таблицы, изображения).
     """
     
-    def __init__(self, model_type="detectron2"):
+    def __init__(self, model_type="detectron2", dpi=150):
         """
         Инициализация экстрактора макета.
         
         Args:
             model_type (str): Тип модели для распознавания макета.
                 Поддерживаемые значения: "detectron2", "paddleocr"
+            dpi (int): Разрешение, с которым страницы растеризуются для модели.
+                Координаты блоков возвращаются в пунктах PDF (1/72 дюйма)
+                и от разрешения не зависят.
         """
         self.model_type = model_type
+        self.dpi = dpi
+        
+        # Матрица масштабирования строится один раз для всех страниц
+        self._matrix = fitz.Matrix(dpi / 72, dpi / 72)
+        
+        # Переход от пикселей изображения к пунктам PDF
+        self._points_per_pixel = 72 / dpi
         self.model = self._load_model(model_type)
         
     def _load_model(self, model_type):
@@ -85,68 +104,43 @@ class LayoutExtractor:
             return_image (bool): Возвращать ли также изображение страницы
             
         Returns:
-            dict: Словарь с распознанными элементами макета
+            dict: Словарь с распознанными элементами макета (координаты в пунктах PDF)
             или кортеж (dict, Image), если return_image=True
         """
-        # Конвертируем страницу в изображение
-        pix = page.get_pixmap(matrix=fitz.Matrix(300/72, 300/72))
-        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-        img_np = np.array(img)
+        # Конвертируем страницу в массив (H, W, 3) без промежуточного PIL-изображения.
+        # Массив ссылается на память pixmap без копирования
+        pix = page.get_pixmap(matrix=self._matrix, colorspace=fitz.csRGB, alpha=False)
+        img_np = np.frombuffer(pix.samples_mv, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
         
         # Распознаем макет
         layout = self.model.detect(img_np)
         
         # Группируем результаты по типам элементов
-        result = {
-            "text_blocks": [],
-            "titles": [],
-            "lists": [],
-            "tables": [],
-            "figures": []
-        }
+        result = {category: [] for category in _BLOCK_CATEGORIES.values()}
+        scale = self._points_per_pixel
         
         for block in layout:
-            # Получаем координаты блока
+            # Блоки неизвестных типов пропускаем
+            category = _BLOCK_CATEGORIES.get(block.type)
+            if category is None:
+                continue
+                
+            # Получаем координаты блока и переводим их из пикселей в пункты PDF,
+            # в которых с ними работают Camelot и PyMuPDF
             bbox = block.block.bbox
-            coords = {
-                "x1": int(bbox.x_1),
-                "y1": int(bbox.y_1),
-                "x2": int(bbox.x_2),
-                "y2": int(bbox.y_2)
-            }
-            
-            block_type = block.type
-            confidence = block.score
-            
-            # Добавляем блок в соответствующую категорию
-            if block_type == "Text":
-                result["text_blocks"].append({
-                    "coords": coords,
-                    "confidence": confidence
-                })
-            elif block_type == "Title":
-                result["titles"].append({
-                    "coords": coords,
-                    "confidence": confidence
-                })
-            elif block_type == "List":
-                result["lists"].append({
-                    "coords": coords,
-                    "confidence": confidence
-                })
-            elif block_type == "Table":
-                result["tables"].append({
-                    "coords": coords,
-                    "confidence": confidence
-                })
-            elif block_type == "Figure":
-                result["figures"].append({
-                    "coords": coords,
-                    "confidence": confidence
-                })
+            result[category].append({
+                "coords": {
+                    "x1": round(bbox.x_1 * scale, 2),
+                    "y1": round(bbox.y_1 * scale, 2),
+                    "x2": round(bbox.x_2 * scale, 2),
+                    "y2": round(bbox.y_2 * scale, 2)
+                },
+                "confidence": block.score
+            })
         
         if return_image:
-            return result, img
+            # Image.fromarray копирует данные, поэтому изображение не зависит от pixmap
+            return result, Image.fromarray(img_np)
         return result
     
     def visualize(self, page, output_path=None):
@@ -162,19 +156,22 @@ class LayoutExtractor:
         """
         result, img = self.extract_layout(page, return_image=True)
         
-        # Подготовка данных для визуализации
+        # Подготовка данных для визуализации: координаты переводятся
+        # из пунктов PDF обратно в пиксели изображения
+        scale = 1 / self._points_per_pixel
         layout_data = []
         for category, blocks in result.items(): # TODO: Нет такого атрибута items
             for block in blocks:
                 coords = block["coords"]
                 layout_data.append({
                     "category": category.replace("_", " ").title(),
-                    "bbox": [coords["x1"], coords["y1"], coords["x2"], coords["y2"]],
+                    "bbox": [coords["x1"] * scale, coords["y1"] * scale,
+                             coords["x2"] * scale, coords["y2"] * scale],
                     "score": block["confidence"]
                 })
         
-        # Визуализация
-        viz_img = visualize_layout(img, layout_data)
+        # Визуализация. Изображение создано здесь же, поэтому копия не нужна
+        viz_img = visualize_layout(img, layout_data, inplace=True)
         
         if output_path:
             viz_img.save(output_path)
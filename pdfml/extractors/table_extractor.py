@@ -7,19 +7,145 @@ import pandas as pd
 import numpy as np
 import os
 import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from itertools import repeat
 from PIL import Image
 
 from ..utils.logger import get_logger
+from ..utils.parallel import get_mp_context
 
 logger = get_logger(__name__)
 
 
+def _nearest_region(regions, bbox):
+    """
+    Поиск региона, центр которого ближе всего к центру таблицы.
+    
+    Args:
+        regions (np.ndarray): Массив регионов формы (N, 4)
+        bbox (tuple): Координаты таблицы (x1, y1, x2, y2)
+        
+    Returns:
+        int: Индекс ближайшего региона
+    """
+    centers = (regions[:, :2] + regions[:, 2:]) / 2
+    target = np.array([(bbox[0] + bbox[2]) / 2, (bbox[1] + bbox[3]) / 2], dtype=np.float32)
+    return int(np.argmin(((centers - target) ** 2).sum(axis=1)))
+
+
+def _write_csv(df, file_path):
+    """
+    Запись таблицы в CSV-файл.
+    
+    Используется DataFrame.to_csv: формат файлов (кавычки, запись чисел
+    и пропусков) остается прежним для всех, кто их читает.
+    
+    Args:
+        df (pandas.DataFrame): Таблица
+        file_path (str): Путь к CSV-файлу
+        
+    Returns:
+        str: Путь к созданному файлу
+    """
+    df.to_csv(file_path, index=False)
+    return file_path
+
+
+def _page_count(pdf_path):
+    """
+    Количество страниц PDF-документа.
+    
+    Args:
+        pdf_path (str): Путь к PDF-файлу
+        
+    Returns:
+        int: Количество страниц
+    """
+    import fitz
+    
+    with fitz.Document(pdf_path) as doc:
+        return len(doc)
+
+
+def _parse_pages(pages, pdf_path):
+    """
+    Разбор номеров страниц в формате Camelot.
+    
+    Args:
+        pages (str или list): 'all', строка вида '1,3,5-7,10-end'
+                              или список номеров страниц
+        pdf_path (str): Путь к PDF-файлу (нужен для 'all' и 'end')
+        
+    Returns:
+        list: Отсортированный список номеров страниц (с 1)
+    """
+    if not isinstance(pages, str):
+        pages = ",".join(map(str, pages))
+        
+    n_pages = None
+    result = set()
+    
+    for part in pages.split(","):
+        part = part.strip()
+        if part == "all" or part.endswith("end"):
+            if n_pages is None:
+                n_pages = _page_count(pdf_path)
+                
+        if part == "all":
+            result.update(range(1, n_pages + 1))
+        elif "-" in part:
+            first, last = part.split("-")
+            result.update(range(int(first), (n_pages if last == "end" else int(last)) + 1))
+        else:
+            result.add(int(part))
+            
+    return sorted(result)
+
+
+def _table_data(table):
+    """
+    Преобразование таблицы Camelot в словарь с данными и метаданными.
+    
+    Args:
+        table (camelot.core.Table): Таблица Camelot
+        
+    Returns:
+        dict: Данные таблицы
+    """
+    # Преобразуем в DataFrame для удобства работы
+    df = table.df
+    
+    return {
+        "dataframe": df,
+        "accuracy": table.accuracy,
+        "whitespace": table.whitespace,
+        "shape": df.shape
+    }
+
+
+def _read_page_tables(pdf_path, page_num, kwargs):
+    """
+    Извлечение таблиц одной страницы в рабочем процессе.
+    
+    Args:
+        pdf_path (str): Путь к PDF-файлу
+        page_num (int): Номер страницы (с 1)
+        kwargs (dict): Параметры для camelot.read_pdf
+        
+    Returns:
+        list: Список данных таблиц страницы
+    """
+    tables = camelot.read_pdf(pdf_path, pages=str(page_num), **kwargs)
+    return [_table_data(table) for table in tables]
+
+
 class TableExtractor:
     """
     Класс для извлечения таблиц из PDF-документов.
     """
     
-    def __init__(self, flavor="lattice"):
+    def __init__(self, flavor="lattice", engine="camelot", num_workers=None):
         """
         Инициализация экстрактора таблиц.
         
@@ -27,8 +153,18 @@ class TableExtractor:
             flavor (str): Метод извлечения таблиц.
                 'lattice': для таблиц с видимыми линиями.
                 'stream': для таблиц без видимых линий.
+            engine (str): Библиотека для extract_tables.
+                'camelot': точнее, но медленнее (lattice использует Ghostscript).
+                'pdfplumber': быстрый путь без растеризации страниц.
+            num_workers (int): Количество процессов для постраничного
+                извлечения Camelot. Если None, используется min(число ядер, 4).
         """
+        if engine not in ("camelot", "pdfplumber"):
+            raise ValueError(f"Неподдерживаемая библиотека извлечения таблиц: {engine}")
+            
         self.flavor = flavor
+        self.engine = engine
+        self.num_workers = num_workers if num_workers is not None else min(os.cpu_count() or 1, 4)
         
     def extract_tables(self, pdf_path, pages="all", **kwargs):
         """
@@ -43,51 +179,138 @@ class TableExtractor:
         Returns:
             dict: Словарь {номер_страницы: список_таблиц}
         """
+        return dict(self.iter_tables(pdf_path, pages, **kwargs))
+    
+    def iter_tables(self, pdf_path, pages="all", **kwargs):
+        """
+        Постраничное извлечение таблиц из PDF-документа.
+        
+        Таблицы возвращаются по мере извлечения в порядке страниц,
+        поэтому их можно сохранять, не храня таблицы всего документа.
+        
+        Args:
+            pdf_path (str): Путь к PDF-файлу
+            pages (str или list): Страницы для извлечения таблиц.
+                                'all' для всех страниц или список номеров страниц.
+            **kwargs: Дополнительные параметры для camelot.read_pdf
+            
+        Yields:
+            tuple: (номер_страницы, список_таблиц) для страниц с таблицами
+        """
         try:
             # Устанавливаем параметры по умолчанию, если не указаны
             kwargs.setdefault("flavor", self.flavor)
             
             logger.info(f"Извлечение таблиц из {pdf_path} (страницы: {pages})")
-            tables = camelot.read_pdf(pdf_path, pages=pages, **kwargs)
-            
-            logger.info(f"Найдено {len(tables)} таблиц")
-            
-            # Группируем таблицы по страницам
-            result = {}
-            for i, table in enumerate(tables._tables):
-                page_num = table.page
+            if self.engine == "pdfplumber":
+                page_tables = self._iter_tables_with_pdfplumber(pdf_path, pages, kwargs["flavor"])
+            else:
+                page_tables = self._iter_tables_with_camelot(pdf_path, pages, kwargs)
                 
-                if page_num not in result:
-                    result[page_num] = []
+            n_tables = 0
+            for page_num, tables in page_tables:
+                if not tables:
+                    continue
                     
-                # Преобразуем в DataFrame для удобства работы
-                df = table.df
-                
-                # Добавляем метаданные таблицы
-                table_data = {
-                    "dataframe": df,
-                    "accuracy": table.accuracy,
-                    "whitespace": table.whitespace,
-                    "order": i,
-                    "shape": df.shape
-                }
-                
-                result[page_num].append(table_data)
+                # Добавляем порядковый номер таблицы в документе
+                for table_data in tables:
+                    table_data["order"] = n_tables
+                    n_tables += 1
+                    
+                yield page_num, tables
                 
-            return result
+            logger.info(f"Найдено {n_tables} таблиц")
             
         except Exception as e:
             logger.error(f"Ошибка при извлечении таблиц: {e}")
-            return {}
+    
+    def _iter_tables_with_camelot(self, pdf_path, pages, kwargs):
+        """
+        Извлечение таблиц с помощью Camelot.
+        
+        Каждая страница обрабатывается отдельным вызовом camelot.read_pdf,
+        при num_workers > 1 - в пуле процессов. Если пул завершился
+        аварийно, оставшиеся страницы обрабатываются в текущем процессе.
+        
+        Args:
+            pdf_path (str): Путь к PDF-файлу
+            pages (str или list): Страницы для извлечения таблиц
+            kwargs (dict): Параметры для camelot.read_pdf
+            
+        Yields:
+            tuple: (номер_страницы, список_таблиц) в порядке страниц
+        """
+        page_list = _parse_pages(pages, pdf_path)
+        
+        if self.num_workers <= 1 or len(page_list) < 2:
+            for page_num in page_list:
+                yield page_num, _read_page_tables(pdf_path, page_num, kwargs)
+            return
+            
+        done = 0
+        try:
+            with ProcessPoolExecutor(
+                max_workers=min(self.num_workers, len(page_list)),
+                mp_context=get_mp_context()
+            ) as executor:
+                page_tables = executor.map(_read_page_tables, repeat(pdf_path), page_list, repeat(kwargs))
+                for page_num, tables in zip(page_list, page_tables):
+                    yield page_num, tables
+                    done += 1
+        except BrokenProcessPool as e:
+            logger.warning(f"Пул процессов недоступен, извлекаем таблицы в текущем процессе: {e}")
+            for page_num in page_list[done:]:
+                yield page_num, _read_page_tables(pdf_path, page_num, kwargs)
+    
+    def _iter_tables_with_pdfplumber(self, pdf_path, pages, flavor):
+        """
+        Извлечение таблиц с помощью pdfplumber.
+        
+        Args:
+            pdf_path (str): Путь к PDF-файлу
+            pages (str или list): Страницы для извлечения таблиц
+            flavor (str): 'lattice' - границы таблиц по линиям,
+                          'stream' - по выравниванию текста
+            
+        Yields:
+            tuple: (номер_страницы, список_таблиц) в порядке страниц
+        """
+        import pdfplumber
+        
+        if flavor == "stream":
+            table_settings = {"vertical_strategy": "text", "horizontal_strategy": "text"}
+        else:
+            table_settings = {"vertical_strategy": "lines", "horizontal_strategy": "lines"}
+            
+        with pdfplumber.open(pdf_path) as pdf:
+            for page_num in _parse_pages(pages, pdf_path):
+                if page_num > len(pdf.pages):
+                    continue
+                    
+                tables = []
+                for rows in pdf.pages[page_num - 1].extract_tables(table_settings):
+                    # Пустые ячейки pdfplumber возвращает как None, Camelot - как ""
+                    df = pd.DataFrame(rows).fillna("")
+                    tables.append({
+                        "dataframe": df,
+                        "accuracy": None,
+                        "whitespace": None,
+                        "shape": df.shape
+                    })
+                    
+                # Номер страницы - int, как table.page у Camelot
+                yield page_num, tables
     
     def extract_tables_from_regions(self, pdf_path, regions, **kwargs):
         """
         Извлечение таблиц из определенных регионов документа.
         
+        Все регионы страницы передаются в Camelot одним вызовом.
+        
         Args:
             pdf_path (str): Путь к PDF-файлу
-            regions (dict): Словарь {номер_страницы: список_координат_регионов}
-                           Формат координат: [x1, y1, x2, y2]
+            regions (dict): Словарь {номер_страницы: координаты_регионов}
+                           Массив (или список) строк формата [x1, y1, x2, y2]
             **kwargs: Дополнительные параметры для camelot.read_pdf
             
         Returns:
@@ -95,38 +318,51 @@ class TableExtractor:
         """
         result = {}
         
+        # Устанавливаем параметры по умолчанию
+        kwargs.setdefault("flavor", self.flavor)
+        
         for page_num, region_list in regions.items():
             result[page_num] = []
             
-            for i, region in enumerate(region_list):
-                try:
-                    # Устанавливаем параметры по умолчанию
-                    kwargs.setdefault("flavor", self.flavor)
-                    
-                    # Добавляем координаты области
-                    kwargs["table_areas"] = [region]
-                    
-                    logger.info(f"Извлечение таблицы из региона {region} на странице {page_num}")
-                    tables = camelot.read_pdf(pdf_path, pages=str(page_num), **kwargs)
-                    
-                    if len(tables) > 0:
-                        table = tables[0]
-                        df = table.df
-                        
-                        table_data = {
-                            "dataframe": df,
-                            "accuracy": table.accuracy,
-                            "whitespace": table.whitespace,
-                            "region": region,
-                            "shape": df.shape
-                        }
-                        
-                        result[page_num].append(table_data)
-                    else:
-                        logger.warning(f"Таблица не найдена в регионе {region} на странице {page_num}")
+            region_array = np.asarray(region_list, dtype=np.float32).reshape(-1, 4)
+            if len(region_array) == 0:
+                continue
+                
+            # Camelot ожидает области в виде строк "x1,y1,x2,y2"
+            table_areas = [",".join(f"{c:g}" for c in region) for region in region_array.tolist()]
+            
+            try:
+                logger.info(f"Извлечение таблиц из {len(table_areas)} регионов на странице {page_num}")
+                tables = camelot.read_pdf(
+                    pdf_path,
+                    pages=str(page_num),
+                    **{**kwargs, "table_areas": table_areas}
+                )
+            except Exception as e:
+                logger.error(f"Ошибка при извлечении таблиц из регионов на странице {page_num}: {e}")
+                continue
+                
+            if len(tables) < len(table_areas):
+                logger.warning(
+                    f"Таблицы найдены в {len(tables)} из {len(table_areas)} регионов на странице {page_num}"
+                )
+                
+            for i, table in enumerate(tables):
+                # Camelot сортирует таблицы по положению на странице,
+                # поэтому регион определяется по координатам таблицы
+                bbox = getattr(table, "_bbox", None)
+                index = _nearest_region(region_array, bbox) if bbox is not None else min(i, len(region_array) - 1)
+                df = table.df
+                
+                table_data = {
+                    "dataframe": df,
+                    "accuracy": table.accuracy,
+                    "whitespace": table.whitespace,
+                    "region": region_array[index].tolist(),
+                    "shape": df.shape
+                }
                 
-                except Exception as e:
-                    logger.error(f"Ошибка при извлечении таблицы из региона {region}: {e}")
+                result[page_num].append(table_data)
         
         return result
     
@@ -135,25 +371,29 @@ class TableExtractor:
         Сохранение извлеченных таблиц в CSV файлы.
         
         Args:
-            tables (dict): Словарь с извлеченными таблицами
+            tables (dict или iterable): Словарь с извлеченными таблицами
+                или пары (номер_страницы, список_таблиц), например из iter_tables
             output_dir (str): Путь для сохранения CSV файлов
             
         Returns:
             list: Список путей к созданным файлам
         """
         os.makedirs(output_dir, exist_ok=True)
-        file_paths = []
         
-        for page_num, table_list in tables.items():
-            for i, table in enumerate(table_list):
-                df = table["dataframe"]
-                
-                file_name = f"page_{page_num}_table_{i}.csv"
-                file_path = os.path.join(output_dir, file_name)
-                
-                df.to_csv(file_path, index=False)
-                file_paths.append(file_path)
-                
-                logger.info(f"Таблица сохранена в {file_path}")
+        if isinstance(tables, dict):
+            tables = tables.items()
+            
+        # Основное время уходит на запись файлов, поэтому пишем их параллельно.
+        # Таблицы отправляются на запись по мере поступления
+        futures = []
+        with ThreadPoolExecutor(max_workers=max(2 * self.num_workers, 1)) as executor:
+            for page_num, table_list in tables:
+                for i, table in enumerate(table_list):
+                    file_name = f"page_{page_num}_table_{i}.csv"
+                    futures.append(executor.submit(_write_csv, table["dataframe"], os.path.join(output_dir, file_name)))
+                    
+        file_paths = [future.result() for future in futures]
+        for file_path in file_paths:
+            logger.info(f"Таблица сохранена в {file_path}")
         
         return file_paths 
\ No newline at end of file
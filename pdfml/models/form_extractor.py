@@ -2,40 +2,182 @@
 Модуль для извлечения данных из форм
 """
 
+import re
+from concurrent.futures import ThreadPoolExecutor
 import torch
 from transformers import LayoutLMv3Processor, LayoutLMv3ForTokenClassification
 import numpy as np
-from PIL import Image
 import fitz
 from collections import defaultdict
+from typing import NamedTuple, List
 
 from ..utils.logger import get_logger
 
+try:
+    from numba import njit
+except ImportError:
+    # Без numba группировка выполняется тем же кодом в интерпретаторе
+    def njit(*args, **kwargs):
+        return lambda func: func
+
 logger = get_logger(__name__)
 
+# Поддерживаемая точность весов модели на GPU
+_PRECISIONS = {
+    "bf16": torch.bfloat16,
+    "fp16": torch.float16,
+    "fp32": torch.float32
+}
+
+# Шаблоны пар ключ-значение. Длина ключа ограничена, чтобы исключить
+# квадратичный возврат на длинных строках из букв и пробелов, а ключ
+# начинается только в начале слова, чтобы длинный ключ не обрезался посреди слова.
+_KV_PATTERNS = [
+    re.compile(r'(?<![A-Za-zА-Яа-я])([A-Za-zА-Яа-я][A-Za-zА-Яа-я\s]{0,63}):\s*([^:\n]+)'),  # Ключ: Значение
+    re.compile(r'(?<![A-Za-zА-Яа-я])([A-Za-zА-Яа-я][A-Za-zА-Яа-я\s]{0,63})\s+-\s+([^-\n]+)'),  # Ключ - Значение
+    re.compile(r'(?<![A-Za-zА-Яа-я])([A-Za-zА-Яа-я][A-Za-zА-Яа-я\s]{0,63})=\s*([^=\n]+)')  # Ключ = Значение
+]
+
+# Коды префиксов BIO-разметки. _BIO_SKIP - токен не меняет текущее поле
+# (специальные токены и метки без префикса B-/I-)
+_BIO_O, _BIO_B, _BIO_I, _BIO_SKIP = 0, 1, 2, 3
+
+
+@njit(cache=True)
+def _group_bio(prefixes, entities, bbox):
+    """
+    Группировка BIO-меток токенов в поля.
+    
+    Args:
+        prefixes (np.ndarray): Коды префиксов меток токенов (_BIO_*)
+        entities (np.ndarray): Коды типов сущностей токенов
+        bbox (np.ndarray): Координаты токенов, форма (N, 4)
+        
+    Returns:
+        tuple: (номер поля каждого токена или -1, коды типов полей,
+                рамки полей формы (M, 4))
+    """
+    n = prefixes.shape[0]
+    token_fields = np.full(n, -1, dtype=np.int32)
+    field_entities = np.empty(n, dtype=np.int32)
+    field_bbox = np.empty_like(bbox)
+    
+    n_fields = 0
+    current_entity = -1
+    
+    for i in range(n):
+        prefix = prefixes[i]
+        
+        # Начало нового поля
+        if prefix == _BIO_B:
+            current_entity = entities[i]
+            field_entities[n_fields] = current_entity
+            for j in range(4):
+                field_bbox[n_fields, j] = bbox[i, j]
+            token_fields[i] = n_fields
+            n_fields += 1
+        
+        # Продолжение текущего поля
+        elif prefix == _BIO_I and current_entity != -1 and current_entity == entities[i]:
+            k = n_fields - 1
+            token_fields[i] = k
+            field_bbox[k, 0] = min(field_bbox[k, 0], bbox[i, 0])
+            field_bbox[k, 1] = min(field_bbox[k, 1], bbox[i, 1])
+            field_bbox[k, 2] = max(field_bbox[k, 2], bbox[i, 2])
+            field_bbox[k, 3] = max(field_bbox[k, 3], bbox[i, 3])
+        
+        # Вне полей
+        elif prefix == _BIO_O:
+            current_entity = -1
+            
+    return token_fields, field_entities[:n_fields], field_bbox[:n_fields]
+
+
+class _FormFields(NamedTuple):
+    """
+    Поля формы страницы в виде параллельных массивов.
+    
+    Рамки всех полей хранятся одним непрерывным массивом, поэтому
+    геометрические расчеты выполняются над ним без преобразований.
+    """
+    types: List[str]
+    texts: List[str]
+    bboxes: np.ndarray  # (N, 4), int32
+
 
 class FormExtractor:
     """
     Класс для извлечения данных из форм с использованием LayoutLM.
     """
     
-    def __init__(self, model_name="microsoft/layoutlmv3-base"):
+    def __init__(self, model_name="microsoft/layoutlmv3-base", batch_size=None, device=None, quantize=False,
+                 dpi=150, precision="bf16", compile_model=False):
         """
         Инициализация экстрактора форм.
         
         Args:
             model_name (str): Имя предобученной модели LayoutLM
+            batch_size (int): Количество страниц в одном проходе модели.
+                              Если None, 8 на GPU и 4 на CPU;
+                              0 - все страницы документа за один проход.
+            device (str): Устройство для модели ("cpu", "cuda").
+                          Если None, выбирается GPU при его наличии.
+            quantize (bool): Квантизовать ли линейные слои в int8 на CPU.
+                             Ускоряет инференс, но меняет выходы модели и может
+                             снизить точность распознанных полей, поэтому
+                             по умолчанию выключено.
+            dpi (int): Разрешение, с которым страницы растеризуются для модели
+            precision (str): Точность весов на GPU: "bf16", "fp16" или "fp32"
+            compile_model (bool): Компилировать ли модель через torch.compile
         """
         self.model_name = model_name
+        self.dpi = dpi
+        
+        # Матрица масштабирования строится один раз для всех страниц
+        self._matrix = fitz.Matrix(dpi / 72, dpi / 72)
         
+        if precision not in _PRECISIONS:
+            raise ValueError(f"Неподдерживаемая точность: {precision}")
+            
         # Загружаем модель и процессор
         try:
-            self.processor = LayoutLMv3Processor.from_pretrained(model_name)
+            self.processor = LayoutLMv3Processor.from_pretrained(model_name, use_fast=True)
             self.model = LayoutLMv3ForTokenClassification.from_pretrained(model_name)
             logger.info(f"Модель {model_name} успешно загружена")
         except Exception as e:
             logger.error(f"Ошибка при загрузке модели: {e}")
             raise
+            
+        if device is None:
+            device = "cuda" if torch.cuda.is_available() else "cpu"
+        self.device = torch.device(device)
+        self.model = self.model.to(self.device).eval()
+        
+        # Отдельный поток CUDA для копирования входных данных следующей пачки,
+        # пока модель обрабатывает текущую
+        self._copy_stream = torch.cuda.Stream(self.device) if self.device.type == "cuda" else None
+        
+        # Тип данных, в котором выполняется инференс на GPU (None - CPU)
+        self.dtype = None
+        
+        if self.device.type == "cpu":
+            if quantize:
+                self.model = torch.quantization.quantize_dynamic(
+                    self.model, {torch.nn.Linear}, dtype=torch.qint8
+                )
+                logger.info("Линейные слои модели квантизованы в int8")
+        else:
+            self.dtype = _PRECISIONS[precision]
+            self.model = self.model.to(self.dtype)
+            logger.info(f"Модель переведена в {precision}")
+            
+        if compile_model:
+            self.model = torch.compile(self.model, mode="reduce-overhead")
+            logger.info("Модель скомпилирована через torch.compile")
+            
+        if batch_size is None:
+            batch_size = 8 if self.device.type == "cuda" else 4
+        self.batch_size = batch_size
         
         # Словарь меток по умолчанию для форм
         self.default_labels = {
@@ -53,7 +195,7 @@ class FormExtractor:
         }
         
         # Пользовательские метки могут быть установлены позже
-        self.label_map = self.default_labels
+        self.set_label_map(self.default_labels)
         
     def set_label_map(self, label_map):
         """
@@ -63,137 +205,254 @@ class FormExtractor:
             label_map (dict): Словарь {id: label_name}
         """
         self.label_map = label_map
-        logger.info(f"Установлена пользовательская карта меток: {label_map}")
         
-    def extract_form_fields(self, pdf_path, page_numbers=None):
+        # Коды префиксов и типов сущностей для каждого id метки
+        size = max(label_map, default=0) + 1
+        self._label_prefixes = np.full(size, _BIO_O, dtype=np.int8)
+        self._label_entities = np.full(size, -1, dtype=np.int32)
+        self._entity_names = []
+        entity_codes = {}
+        
+        for label_id, label in label_map.items():
+            if label[:2] in ("B-", "I-"):
+                entity = label[2:]
+                if entity not in entity_codes:
+                    entity_codes[entity] = len(self._entity_names)
+                    self._entity_names.append(entity)
+                self._label_prefixes[label_id] = _BIO_B if label[:2] == "B-" else _BIO_I
+                self._label_entities[label_id] = entity_codes[entity]
+            elif label != "O":
+                self._label_prefixes[label_id] = _BIO_SKIP
+                
+        if label_map is not self.default_labels:
+            logger.info(f"Установлена пользовательская карта меток: {label_map}")
+        
+    def extract_form_fields(self, pdf_path, page_numbers=None, document=None):
         """
         Извлечение полей формы из PDF.
         
         Args:
-            pdf_path (str): Путь к PDF-файлу
+            pdf_path (str или fitz.Document): Путь к PDF-файлу или уже открытый документ
             page_numbers (list): Список номеров страниц для обработки.
                                Если None, обрабатываются все страницы.
+            document (fitz.Document): Уже открытый документ. Если указан,
+                               файл не открывается и не разбирается повторно.
                                
         Returns:
             dict: Словарь {номер_страницы: список_полей}
         """
-        # Открываем PDF
+        return dict(self.iter_form_fields(pdf_path, page_numbers, document))
+    
+    def iter_form_fields(self, pdf_path, page_numbers=None, document=None):
+        """
+        Постраничное извлечение полей формы из PDF.
+        
+        Поля возвращаются после обработки каждой пачки страниц,
+        поэтому их можно обрабатывать, не храня поля всего документа.
+        
+        Args:
+            pdf_path (str или fitz.Document): Путь к PDF-файлу или уже открытый документ
+            page_numbers (list): Список номеров страниц для обработки.
+                               Если None, обрабатываются все страницы.
+            document (fitz.Document): Уже открытый документ. Если указан,
+                               файл не открывается и не разбирается повторно.
+                               
+        Yields:
+            tuple: (номер_страницы, список_полей)
+        """
+        if document is None and isinstance(pdf_path, fitz.Document):
+            document = pdf_path
+            
+        doc = None
+        
+        # Открываем PDF, если документ не передан. Переданный документ
+        # остается открытым и может использоваться повторно
         try:
-            doc = fitz.Document(pdf_path) 
+            doc = document if document is not None else fitz.Document(pdf_path)
             
             if page_numbers is None:
                 page_numbers = range(len(doc))
                 
-            result = {}
-            
+            n_pages = len(doc)
+            valid_pages = []
             for page_num in page_numbers:
-                if page_num >= len(doc):
+                if page_num >= n_pages:
                     logger.warning(f"Страница {page_num} не существует")
                     continue
-                    
-                page = doc[page_num]
-                fields = self._process_page(page)
-                result[page_num] = fields
+                valid_pages.append(page_num)
                 
-            doc.close()
-            return result
+            # Страницы обрабатываются пачками по batch_size за один проход модели.
+            # Следующая пачка растеризуется и проходит OCR процессора в фоновом
+            # потоке, пока модель обрабатывает текущую. К документу обращается
+            # только фоновый поток: PyMuPDF не поддерживает конкурентный доступ.
+            batch_size = self.batch_size or max(len(valid_pages), 1)
+            batches = [
+                valid_pages[start:start + batch_size]
+                for start in range(0, len(valid_pages), batch_size)
+            ]
+            
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                pending = executor.submit(self._encode_document_pages, doc, batches[0]) if batches else None
+                
+                for i, batch in enumerate(batches):
+                    encoding, inputs = pending.result()
+                    if i + 1 < len(batches):
+                        pending = executor.submit(self._encode_document_pages, doc, batches[i + 1])
+                        
+                    yield from zip(batch, self._predict_fields(encoding, inputs))
                 
         except Exception as e:
             logger.error(f"Ошибка при обработке PDF: {e}")
-            return {}
             
-    def _process_page(self, page):
+        finally:
+            if document is None and doc is not None:
+                doc.close()
+            
+    def _encode_document_pages(self, doc, page_numbers):
+        """
+        Подготовка входных данных модели для страниц документа
+        и их копирование на устройство модели.
+        
+        Args:
+            doc (fitz.Document): Открытый PDF-документ
+            page_numbers (list): Номера страниц
+            
+        Returns:
+            tuple: (BatchEncoding на CPU, входные тензоры на устройстве модели)
         """
-        Обработка одной страницы и извлечение полей формы.
+        return self._to_device(self._encode_pages([doc[page_num] for page_num in page_numbers]))
+    
+    def _encode_pages(self, pages):
+        """
+        Растеризация страниц и подготовка входных данных модели.
         
         Args:
-            page: Страница PDF (объект PyMuPDF)
+            pages (list): Страницы PDF (объекты PyMuPDF)
             
         Returns:
-            list: Список извлеченных полей
+            BatchEncoding: Входные данные модели
         """
-        # Конвертируем страницу в изображение
-        pix = page.get_pixmap(matrix=fitz.Matrix(300/72, 300/72)) # TODO: Нет такого метода get_pixmap
-        img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
+        # Конвертируем страницы в массивы (H, W, 3): процессор принимает их напрямую.
+        # Массивы ссылаются на память pixmap без копирования, поэтому pixmap
+        # хранятся до завершения работы процессора
+        pixmaps = [page.get_pixmap(matrix=self._matrix, colorspace=fitz.csRGB, alpha=False) for page in pages]
+        images = [
+            np.frombuffer(pix.samples_mv, dtype=np.uint8).reshape(pix.height, pix.width, pix.n)
+            for pix in pixmaps
+        ]
         
-        # Получаем текст страницы для дополнительного контекста
-        text = page.get_text()
+        return self.processor(images, return_tensors="pt", padding=True, truncation=True)
+    
+    def _to_device(self, encoding):
+        """
+        Копирование входных данных модели на ее устройство.
+        
+        На GPU тензоры закрепляются в памяти и копируются асинхронно
+        в отдельном потоке CUDA.
         
+        Args:
+            encoding (BatchEncoding): Входные данные модели на CPU
+            
+        Returns:
+            tuple: (BatchEncoding на CPU, входные тензоры на устройстве модели)
+        """
+        if self._copy_stream is None:
+            return encoding, {key: tensor.to(self.device) for key, tensor in encoding.items()}
+            
+        with torch.cuda.stream(self._copy_stream):
+            inputs = {
+                key: tensor.pin_memory().to(self.device, non_blocking=True)
+                for key, tensor in encoding.items()
+            }
+        return encoding, inputs
+    
+    def _predict_fields(self, encoding, inputs=None):
+        """
+        Предсказание меток токенов и группировка их в поля формы.
+        
+        Args:
+            encoding (BatchEncoding): Входные данные модели для пачки страниц на CPU
+            inputs (dict): Те же данные на устройстве модели. Если None,
+                           копируются из encoding.
+            
+        Returns:
+            list: Списки извлеченных полей для каждой страницы
+        """
+        if inputs is None:
+            encoding, inputs = self._to_device(encoding)
+            
+        if self._copy_stream is not None:
+            # Дожидаемся копирования и передаем тензоры основному потоку CUDA
+            stream = torch.cuda.current_stream(self.device)
+            stream.wait_stream(self._copy_stream)
+            for tensor in inputs.values():
+                tensor.record_stream(stream)
+                
         # Выполняем предсказание с помощью модели
-        encoding = self.processor(img, return_tensors="pt")
+        use_autocast = self.dtype is not None and self.dtype != torch.float32
+        with torch.inference_mode(), torch.autocast(self.device.type, dtype=self.dtype, enabled=use_autocast):
+            outputs = self.model(**inputs)
+            
+        # Обрабатываем результаты. Координаты и токены берутся из копии на CPU
+        predictions = outputs.logits.argmax(-1).cpu().numpy()
+        bboxes = encoding.bbox.numpy()
+        input_ids = encoding.input_ids.numpy()
+        lengths = encoding.attention_mask.sum(-1).tolist()
         
-        with torch.no_grad():
-            outputs = self.model(**encoding)
+        result = []
+        for i, length in enumerate(lengths):
+            # Отбрасываем токены дополнения до общей длины пачки
+            result.append(self._group_fields(input_ids[i, :length], predictions[i, :length], bboxes[i, :length]))
+            
+        return result
+    
+    def _group_fields(self, input_ids, predictions, bbox):
+        """
+        Группировка размеченных токенов страницы в поля формы.
+        
+        Args:
+            input_ids (np.ndarray): Идентификаторы токенов страницы
+            predictions (np.ndarray): Предсказанные метки токенов
+            bbox (np.ndarray): Координаты токенов, форма (N, 4)
             
-        # Обрабатываем результаты
-        predictions = outputs.logits.argmax(-1).squeeze().tolist()
+        Returns:
+            list: Список связанных пар поле-значение
+        """
+        tokenizer = self.processor.tokenizer
+        ids = np.asarray(input_ids)
+        preds = np.asarray(predictions)
+        boxes = np.ascontiguousarray(bbox)
         
-        # Получаем bbox для каждого токена
-        bbox = encoding.bbox[0].tolist()
+        # Метки вне карты меток считаются "O", специальные токены пропускаются
+        known = preds < len(self._label_prefixes)
+        label_ids = np.where(known, preds, 0)
+        prefixes = np.where(known, self._label_prefixes[label_ids], _BIO_O).astype(np.int8)
+        prefixes[np.isin(ids, tokenizer.all_special_ids)] = _BIO_SKIP
+        entities = np.where(known, self._label_entities[label_ids], -1).astype(np.int32)
         
-        # Получаем токены
-        tokens = self.processor.tokenizer.convert_ids_to_tokens(encoding.input_ids[0].tolist()) # TODO: Нет такого атрибута tokenizer
+        # Номер поля для каждого токена и объединенные рамки полей
+        token_fields, field_entities, field_bbox = _group_bio(prefixes, entities, boxes)
         
-        # Группируем результаты в поля формы
-        fields = []
-        current_entity = None
-        current_text = ""
-        current_box = None
+        # Номера полей токенов не убывают, поэтому токены каждого поля
+        # образуют непрерывный участок среди отобранных токенов
+        field_tokens = np.flatnonzero(token_fields >= 0)
+        bounds = np.searchsorted(token_fields[field_tokens], np.arange(len(field_entities) + 1))
         
-        for i, (token, pred, box) in enumerate(zip(tokens, predictions, bbox)):
-            label = self.label_map.get(pred, "O")
-            
-            # Пропускаем специальные токены
-            if token.startswith("[CLS]") or token.startswith("[SEP]") or token.startswith("[PAD]"):
+        # Текст поля декодируется быстрым токенизатором целиком
+        types = []
+        texts = []
+        kept = []
+        for k, entity_code in enumerate(field_entities.tolist()):
+            token_ids = ids[field_tokens[bounds[k]:bounds[k + 1]]].tolist()
+            text = tokenizer.decode(token_ids, skip_special_tokens=True).strip()
+            if not text:
                 continue
                 
-            # Начало нового поля
-            if label.startswith("B-"):
-                # Сохраняем предыдущее поле, если оно есть
-                if current_entity is not None and current_text:
-                    fields.append({
-                        "type": current_entity,
-                        "text": current_text.strip(),
-                        "bbox": current_box
-                    })
-                
-                # Начинаем новое поле
-                current_entity = label[2:]  # Убираем префикс "B-"
-                current_text = token.replace("##", "")
-                current_box = box
+            types.append(self._entity_names[entity_code])
+            texts.append(text)
+            kept.append(k)
             
-            # Продолжение текущего поля
-            elif label.startswith("I-") and current_entity == label[2:]:
-                current_text += token.replace("##", "")
-                
-                # Расширяем bbox
-                current_box = [
-                    min(current_box[0], box[0]), # TODO: Нет такого атрибута box
-                    min(current_box[1], box[1]),
-                    max(current_box[2], box[2]),
-                    max(current_box[3], box[3])
-                ]
-            
-            # Вне полей
-            elif label == "O":
-                # Сохраняем предыдущее поле, если оно есть
-                if current_entity is not None and current_text:
-                    fields.append({
-                        "type": current_entity,
-                        "text": current_text.strip(),
-                        "bbox": current_box
-                    })
-                current_entity = None
-                current_text = ""
-                current_box = None
-        
-        # Добавляем последнее поле, если оно есть
-        if current_entity is not None and current_text:
-            fields.append({
-                "type": current_entity,
-                "text": current_text.strip(),
-                "bbox": current_box
-            })
+        fields = _FormFields(types, texts, field_bbox[kept].astype(np.int32).reshape(-1, 4))
         
         # Связываем поля и значения
         paired_fields = self._pair_fields_and_values(fields)
@@ -205,7 +464,7 @@ class FormExtractor:
         Связывает поля и их значения на основе типов и расположения.
         
         Args:
-            fields (list): Список извлеченных полей
+            fields (_FormFields): Извлеченные поля страницы
             
         Returns:
             list: Список связанных пар поле-значение
@@ -213,53 +472,57 @@ class FormExtractor:
         result = []
         
         # Сначала отделяем поля от значений
-        field_elements = [f for f in fields if f["type"] == "FIELD"]
-        value_elements = [f for f in fields if f["type"] == "VALUE"]
+        types = np.array(fields.types, dtype=object)
+        field_indices = np.flatnonzero(types == "FIELD")
+        value_indices = np.flatnonzero(types == "VALUE")
         
-        # Для каждого поля ищем ближайшее значение
-        for field in field_elements:
-            field_box = field["bbox"]
+        if not len(field_indices):
+            return result
             
-            # Находим значения, которые расположены справа или снизу от поля
-            candidates = []
-            for value in value_elements:
-                value_box = value["bbox"]
-                
-                # Вычисляем расстояние между полем и значением
-                # Приоритет: справа, затем снизу
-                is_right = value_box[0] >= field_box[2]  # Значение справа от поля
-                is_below = value_box[1] >= field_box[3]  # Значение снизу от поля
-                
-                if is_right or is_below:
-                    # Вычисляем евклидово расстояние между центрами
-                    field_center = ((field_box[0] + field_box[2]) / 2, (field_box[1] + field_box[3]) / 2)
-                    value_center = ((value_box[0] + value_box[2]) / 2, (value_box[1] + value_box[3]) / 2)
-                    
-                    distance = np.sqrt((field_center[0] - value_center[0])**2 + 
-                                       (field_center[1] - value_center[1])**2)
-                    
-                    candidates.append((value, distance, is_right))
+        matches = np.full(len(field_indices), -1)
+        
+        if len(value_indices):
+            field_boxes = fields.bboxes[field_indices].astype(np.float64)
+            value_boxes = fields.bboxes[value_indices].astype(np.float64)
             
-            # Сортируем кандидатов по расстоянию и приоритету (справа > снизу)
-            candidates.sort(key=lambda x: (not x[2], x[1]))
+            # Квадраты расстояний между центрами всех пар поле-значение (F, V).
+            # Для выбора ближайшего значения корень не нужен
+            field_centers = (field_boxes[:, :2] + field_boxes[:, 2:]) / 2
+            value_centers = (value_boxes[:, :2] + value_boxes[:, 2:]) / 2
+            dx = field_centers[:, None, 0] - value_centers[None, :, 0]
+            dy = field_centers[:, None, 1] - value_centers[None, :, 1]
+            distances = dx * dx + dy * dy
             
-            if candidates:
-                # Берем ближайшее значение
-                matched_value = candidates[0][0]
-                
+            # Кандидаты - значения справа или снизу от поля
+            is_right = value_boxes[None, :, 0] >= field_boxes[:, None, 2]
+            is_below = value_boxes[None, :, 1] >= field_boxes[:, None, 3]
+            
+            # Приоритет: ближайшее значение справа, затем ближайшее снизу
+            right_best = np.where(is_right, distances, np.inf).argmin(axis=1)
+            below_best = np.where(is_below, distances, np.inf).argmin(axis=1)
+            matches = np.where(
+                is_right.any(axis=1), value_indices[right_best],
+                np.where(is_below.any(axis=1), value_indices[below_best], -1)
+            )
+            
+        # Словари и списки координат создаются только для результата
+        texts = fields.texts
+        bboxes = fields.bboxes.tolist()
+        for field_index, value_index in zip(field_indices.tolist(), matches.tolist()):
+            if value_index >= 0:
                 # Добавляем пару поле-значение
                 result.append({
-                    "field_name": field["text"],
-                    "field_value": matched_value["text"],
-                    "field_bbox": field["bbox"],
-                    "value_bbox": matched_value["bbox"]
+                    "field_name": texts[field_index],
+                    "field_value": texts[value_index],
+                    "field_bbox": bboxes[field_index],
+                    "value_bbox": bboxes[value_index]
                 })
             else:
                 # Если значение не найдено, добавляем только поле
                 result.append({
-                    "field_name": field["text"],
+                    "field_name": texts[field_index],
                     "field_value": "",
-                    "field_bbox": field["bbox"],
+                    "field_bbox": bboxes[field_index],
                     "value_bbox": None
                 })
         
@@ -286,17 +549,8 @@ class FormExtractor:
         
         # Дополнительная эвристика для извлечения пар ключ-значение
         # Ищем шаблоны типа "Ключ: Значение" или "Ключ - Значение"
-        import re
-        
-        patterns = [
-            r'([A-Za-zА-Яа-я\s]+):\s*([^:\n]+)',  # Ключ: Значение
-            r'([A-Za-zА-Яа-я\s]+)\s+-\s+([^-\n]+)',  # Ключ - Значение
-            r'([A-Za-zА-Яа-я\s]+)=\s*([^=\n]+)'  # Ключ = Значение
-        ]
-        
-        for pattern in patterns:
-            matches = re.findall(pattern, text)
-            for key, value in matches:
+        for pattern in _KV_PATTERNS:
+            for key, value in pattern.findall(text):
                 key = key.strip()
                 value = value.strip()
                 
@@ -2,16 +2,120 @@
 Модуль для настройки логгирования
 """
 
+import atexit
 import logging
+import queue
+import threading
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 import os
 import sys
 from datetime import datetime
 
+# Максимальный размер файла журнала и число хранимых архивных файлов
+LOG_MAX_BYTES = 10 * 1024 * 1024
+LOG_BACKUP_COUNT = 10
+
+# Каталог и файл журнала определяются один раз при импорте модуля
+_LOGS_DIR = os.path.join(os.getcwd(), 'logs')
+_LOG_FILE = os.path.join(_LOGS_DIR, f"pdfml_{datetime.now().strftime('%Y-%m-%d')}.log")
+
+# Очередь записей журнала и поток, который выводит их в консоль и файл
+_log_queue = None
+_listener = None
+_queue_handlers = []
+_listener_lock = threading.Lock()
+
+# Настроенные логгеры по имени
+_loggers = {}
+
+
+def _create_handlers():
+    """
+    Создание обработчиков вывода в консоль и в файл.
+    
+    Returns:
+        list: Обработчики журнала
+    """
+    # Определяем формат сообщений
+    formatter = logging.Formatter(
+        '[%(asctime)s] [%(name)s] [%(levelname)s] - %(message)s',
+        datefmt='%Y-%m-%d %H:%M:%S'
+    )
+    
+    # Создаем обработчик для вывода в консоль
+    console_handler = logging.StreamHandler(sys.stdout)
+    console_handler.setFormatter(formatter)
+    
+    # Создаем обработчик для записи в файл
+    os.makedirs(_LOGS_DIR, exist_ok=True)
+    
+    # Файл ограничен по размеру и открывается только при первой записи
+    file_handler = RotatingFileHandler(
+        _LOG_FILE,
+        maxBytes=LOG_MAX_BYTES,
+        backupCount=LOG_BACKUP_COUNT,
+        encoding='utf-8',
+        delay=True
+    )
+    file_handler.setFormatter(formatter)
+    
+    return [console_handler, file_handler]
+
+
+def _get_log_queue():
+    """
+    Получение очереди записей журнала.
+    
+    При первом вызове создает обработчики и запускает поток,
+    который форматирует записи и выводит их в консоль и файл.
+    
+    Returns:
+        queue.Queue: Очередь записей журнала
+    """
+    global _log_queue, _listener
+    
+    with _listener_lock:
+        if _log_queue is None:
+            _log_queue = queue.Queue(-1)
+            _listener = QueueListener(_log_queue, *_create_handlers())
+            _listener.start()
+            atexit.register(_listener.stop)
+            
+    return _log_queue
+
+
+def _restart_listener_in_child():
+    """
+    Перезапуск потока записи журнала в дочернем процессе после fork.
+    
+    Потоки не наследуются при fork, поэтому без перезапуска записи
+    дочернего процесса оставались бы в очереди.
+    """
+    global _log_queue, _listener, _listener_lock
+    
+    _listener_lock = threading.Lock()
+    if _listener is None:
+        return
+        
+    _log_queue = queue.Queue(-1)
+    for handler in _queue_handlers:
+        handler.queue = _log_queue
+        
+    _listener = QueueListener(_log_queue, *_listener.handlers)
+    _listener.start()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_listener_in_child)
+
 
 def get_logger(name, level=logging.INFO):
     """
     Создание и настройка логгера.
     
+    Записи помещаются в очередь, а форматирование и вывод выполняются
+    в отдельном потоке, поэтому вызовы логгера не ждут записи в файл.
+    
     Args:
         name (str): Имя логгера
         level (int): Уровень логгирования
@@ -19,39 +123,29 @@ def get_logger(name, level=logging.INFO):
     Returns:
         logging.Logger: Настроенный логгер
     """
+    # Повторные вызовы не обращаются к модулю logging
+    logger = _loggers.get(name)
+    if logger is not None:
+        return logger
+        
     logger = logging.getLogger(name)
     
     # Если логгер уже был настроен, возвращаем его
     if logger.handlers:
+        _loggers[name] = logger
         return logger
     
     logger.setLevel(level)
     
-    # Создаем обработчик для вывода в консоль
-    console_handler = logging.StreamHandler(sys.stdout)
-    console_handler.setLevel(level)
+    # Сообщения не передаются корневому логгеру, чтобы не выводить их дважды
+    logger.propagate = False
     
-    # Определяем формат сообщений
-    formatter = logging.Formatter(
-        '[%(asctime)s] [%(name)s] [%(levelname)s] - %(message)s',
-        datefmt='%Y-%m-%d %H:%M:%S'
-    )
-    console_handler.setFormatter(formatter)
-    
-    # Добавляем обработчик к логгеру
-    logger.addHandler(console_handler)
-    
-    # Создаем обработчик для записи в файл
-    logs_dir = os.path.join(os.getcwd(), 'logs')
-    os.makedirs(logs_dir, exist_ok=True)
-    
-    current_date = datetime.now().strftime('%Y-%m-%d')
-    log_file = os.path.join(logs_dir, f'pdfml_{current_date}.log')
-    
-    file_handler = logging.FileHandler(log_file)
-    file_handler.setLevel(level)
-    file_handler.setFormatter(formatter)
+    # Добавляем обработчик очереди к логгеру
+    queue_handler = QueueHandler(_get_log_queue())
+    queue_handler.setLevel(level)
+    _queue_handlers.append(queue_handler)
     
-    logger.addHandler(file_handler)
+    logger.addHandler(queue_handler)
     
+    _loggers[name] = logger
     return logger 
\ No newline at end of file
@@ -0,0 +1,23 @@
+"""
+Модуль для настройки пулов рабочих процессов
+"""
+
+import multiprocessing
+
+
+def get_mp_context():
+    """
+    Контекст запуска рабочих процессов библиотеки.
+    
+    Процессы не создаются через fork: пулы запускаются, когда в родительском
+    процессе уже работают другие потоки (запись журнала, этапы анализа),
+    и копия их блокировок в дочернем процессе может привести к взаимной
+    блокировке. forkserver при этом запускается быстрее, чем spawn.
+    
+    Returns:
+        multiprocessing.context.BaseContext: Контекст или None для
+                                             способа запуска по умолчанию
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return None 
\ No newline at end of file
@@ -0,0 +1,67 @@
+"""
+Модуль для сохранения результатов анализа в JSON
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def save_json(data, file_path, indent=False):
+    """
+    Сохранение данных в JSON-файл.
+    
+    Если установлен orjson, используется он: сериализация в несколько раз
+    быстрее стандартного json, а целочисленные ключи (номера страниц)
+    и значения numpy обрабатываются без преобразования.
+    
+    Args:
+        data: Данные для сохранения
+        file_path (str): Путь к JSON-файлу
+        indent (bool): Форматировать ли вывод с отступами
+    """
+    if orjson is not None:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        if indent:
+            option |= orjson.OPT_INDENT_2
+            
+        with open(file_path, 'wb') as f:
+            f.write(orjson.dumps(data, option=option))
+        return
+        
+    with open(file_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, indent=2 if indent else None)
+
+
+def save_json_pages(pages, file_path):
+    """
+    Постраничное сохранение результатов в JSON-объект {номер_страницы: данные}.
+    
+    Каждая страница сериализуется и записывается отдельно, поэтому в памяти
+    не собирается строка со всем документом. Файл остается обычным JSON.
+    
+    Args:
+        pages: Словарь {номер_страницы: данные} или итератор пар
+               (номер_страницы, данные), например генератор
+        file_path (str): Путь к JSON-файлу
+    """
+    if isinstance(pages, dict):
+        pages = pages.items()
+        
+    if orjson is not None:
+        def dumps(obj):
+            return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    else:
+        def dumps(obj):
+            return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+            
+    with open(file_path, 'wb') as f:
+        f.write(b"{")
+        separator = b"\n"
+        for page_num, data in pages:
+            f.write(separator + dumps(str(page_num)) + b": " + dumps(data))
+            separator = b",\n"
+        f.write(b"\n}") 
\ No newline at end of file
@@ -2,15 +2,208 @@
 Модуль для визуализации результатов
 """
 
+import io
+import html
+import functools
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.patches as patches
 from PIL import Image, ImageDraw, ImageFont, ImageColor
 import os
 import random
+from operator import itemgetter
 
+# Синонимы типов сущностей: в легенде показывается только основной тип
+_LABEL_ALIASES = {
+    "PER": "PERSON",
+    "NRP": "ORG"
+}
 
-def visualize_layout(image, layout_data, colors=None):
+# Части HTML-страницы visualize_entities: до легенды, между легендой
+# и текстом, после текста
+_ENTITIES_HTML_HEADER = """
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <meta charset="UTF-8">
+        <title>Распознанные сущности</title>
+        <style>
+            body { font-family: Arial, sans-serif; line-height: 1.6; padding: 20px; }
+            .legend { margin-bottom: 20px; }
+            .legend span { display: inline-block; margin-right: 15px; }
+            .legend .color-box { display: inline-block; width: 15px; height: 15px; margin-right: 5px; vertical-align: middle; }
+        </style>
+    </head>
+    <body>
+        <div class="legend">
+            <h3>Типы сущностей:</h3>
+            """
+_ENTITIES_HTML_MIDDLE = """
+        </div>
+        <div class="text">
+            """
+_ENTITIES_HTML_FOOTER = """
+        </div>
+    </body>
+    </html>
+    """
+
+# Начало и конец HTML-страницы visualize_table
+_TABLE_HTML_HEADER = """
+    <!DOCTYPE html>
+    <html>
+    <head>
+        <meta charset="UTF-8">
+        <title>Таблица</title>
+        <style>
+            body { font-family: Arial, sans-serif; padding: 20px; }
+            table.dataframe { border-collapse: collapse; margin: 10px 0; width: 100%; }
+            table.dataframe th { background-color: #f2f2f2; }
+            table.dataframe th, table.dataframe td { border: 1px solid #ddd; padding: 8px; text-align: left; }
+            table.dataframe tr:nth-child(even) { background-color: #f9f9f9; }
+            table.dataframe tr:hover { background-color: #f2f2f2; }
+        </style>
+    </head>
+    <body>
+        <h2>Извлеченная таблица</h2>
+        """
+_TABLE_HTML_FOOTER = """
+    </body>
+    </html>
+    """
+
+
+@functools.lru_cache(maxsize=1)
+def _default_font():
+    """
+    Шрифт подписей (загружается один раз и используется всеми вызовами).
+    
+    Returns:
+        PIL.ImageFont: DejaVuSans 12 pt или встроенный шрифт PIL,
+        если DejaVuSans не найден
+    """
+    try:
+        return ImageFont.truetype("DejaVuSans.ttf", 12)
+    except OSError:
+        return ImageFont.load_default()
+
+
+@functools.lru_cache(maxsize=256)
+def _parse_color(color):
+    """
+    Разбор строки цвета в кортеж RGB с кэшированием.
+    
+    Палитра категорий невелика, поэтому каждая строка цвета
+    разбирается один раз за время работы процесса.
+    
+    Args:
+        color (str): Цвет в формате PIL, например "#3498db"
+        
+    Returns:
+        tuple: Кортеж (R, G, B)
+    """
+    return ImageColor.getrgb(color)
+
+
+def _rgb(color):
+    """
+    Приведение цвета к виду, который принимает ImageDraw.
+    
+    Args:
+        color (str, tuple или int): Цвет в любом формате PIL
+        
+    Returns:
+        tuple или int: Кортеж (R, G, B) для строк, иначе исходное значение
+    """
+    if isinstance(color, str):
+        return _parse_color(color)
+    return color
+
+
+def _escape_with_offsets(text):
+    """
+    Экранирование текста для HTML с пересчетом позиций символов.
+    
+    Текст экранируется целиком за один вызов html.escape, а позиции
+    в исходном тексте переводятся в позиции в экранированном по
+    накопленной сумме удлинений символов.
+    
+    Args:
+        text (str): Исходный текст
+        
+    Returns:
+        tuple: (экранированный текст, массив позиций длины len(text) + 1
+                или None, если текст не изменился)
+    """
+    escaped = html.escape(text)
+    if len(escaped) == len(text):
+        return escaped, None
+        
+    # Удлинение каждого символа при экранировании:
+    # & -> &amp;, < -> &lt;, > -> &gt;, " -> &quot;, ' -> &#x27;
+    codes = np.frombuffer(text.encode("utf-32-le", "surrogatepass"), dtype="<u4")
+    lengths = np.ones(len(codes), dtype=np.int64)
+    lengths[codes == ord("&")] = 5
+    lengths[(codes == ord("<")) | (codes == ord(">"))] = 4
+    lengths[(codes == ord('"')) | (codes == ord("'"))] = 6
+    
+    offsets = np.zeros(len(codes) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    return escaped, offsets
+
+
+@functools.lru_cache(maxsize=256)
+def _mark_tag(label, color):
+    """
+    Открывающий тег подсветки сущности.
+    
+    Args:
+        label (str): Тип сущности
+        color (str): Цвет подсветки
+        
+    Returns:
+        str: Тег <mark> с цветом и всплывающей подсказкой
+    """
+    return f'<mark style="background-color: {color};" title="{html.escape(label)}">'
+
+
+@functools.lru_cache(maxsize=256)
+def _legend_span(label, color):
+    """
+    HTML-элемент легенды для типа сущности.
+    
+    Результат кэшируется: набор типов и цветов невелик,
+    а легенда строится для каждой визуализации.
+    
+    Args:
+        label (str): Тип сущности
+        color (str): Цвет подсветки
+        
+    Returns:
+        str: HTML-код элемента легенды
+    """
+    return f'<span><span class="color-box" style="background-color: {color};"></span>{html.escape(label)}</span>'
+
+
+def _draw_boxes(draw, boxes, color, width=3):
+    """
+    Отрисовка рамок одного цвета.
+    
+    Все примитивы рисуются растеризатором PIL (ImageDraw): он заметно
+    быстрее масок skimage, поэтому при добавлении заливки или многоугольников
+    их следует рисовать через ImageDraw.Draw.polygon здесь же.
+    
+    Args:
+        draw (PIL.ImageDraw.ImageDraw): Объект для рисования
+        boxes (np.ndarray): Рамки формы (N, 4): x1, y1, x2, y2
+        color (tuple): Цвет RGB
+        width (int): Толщина линии
+    """
+    for x1, y1, x2, y2 in boxes.tolist():
+        draw.rectangle((x1, y1, x2, y2), outline=color, width=width)
+
+
+def visualize_layout(image, layout_data, colors=None, inplace=False, draw=None):
     """
     Визуализация распознанного макета PDF-страницы.
     
@@ -19,13 +212,21 @@ def visualize_layout(image, layout_data, colors=None):
         layout_data (list): Список элементов макета
             [{"category": "Text", "bbox": [x1, y1, x2, y2], "score": 0.95}, ...]
         colors (dict): Словарь с цветами для разных категорий
+        inplace (bool): Рисовать ли прямо на переданном изображении.
+            В этом случае возвращается тот же объект, а копия не создается
+        draw (PIL.ImageDraw.ImageDraw): Готовый объект для рисования на image,
+            например оставшийся от предыдущего прохода визуализации. Должен быть
+            создан для этого же изображения; рисование выполняется на месте
         
     Returns:
         PIL.Image: Изображение с визуализацией
     """
     # Копируем изображение, чтобы не изменять оригинал
-    img = image.copy()
-    draw = ImageDraw.Draw(img)
+    if draw is not None:
+        img = image
+    else:
+        img = image if inplace else image.copy()
+        draw = ImageDraw.Draw(img)
     
     # Определяем цвета по умолчанию для категорий
     if colors is None:
@@ -43,29 +244,43 @@ def visualize_layout(image, layout_data, colors=None):
         if category not in colors:
             colors[category] = "#{:06x}".format(random.randint(0, 0xFFFFFF))
     
-    # Рисуем рамки и подписи
-    for item in layout_data:
-        category = item["category"]
-        bbox = item["bbox"]
-        score = item.get("score", 1.0)
+    # Обрезаем рамки по границам изображения одной операцией над всеми
+    # рамками и отбрасываем вырожденные (нулевой или отрицательный размер)
+    bboxes = np.asarray([item["bbox"] for item in layout_data], dtype=np.float32).reshape(-1, 4)
+    np.clip(bboxes[:, 0::2], 0, img.width, out=bboxes[:, 0::2])
+    np.clip(bboxes[:, 1::2], 0, img.height, out=bboxes[:, 1::2])
+    valid = (bboxes[:, 2] > bboxes[:, 0]) & (bboxes[:, 3] > bboxes[:, 1])
+    
+    # Группируем элементы по цвету, чтобы рисовать их одним цветом подряд
+    groups = {}
+    for i in np.flatnonzero(valid).tolist():
+        groups.setdefault(colors[layout_data[i]["category"]], []).append(i)
         
-        color = colors[category]
+    font = _default_font()
+    
+    # Рисуем рамки и подписи
+    for color, indices in groups.items():
+        # Цвет берется из кэша разобранных цветов
+        color = _rgb(color)
+        group_boxes = bboxes[indices]
         
-        # Рисуем рамку
-        draw.rectangle(
-            [(bbox[0], bbox[1]), (bbox[2], bbox[3])], # TODO: Нет такого атрибута bbox
-            outline=color,
-            width=3
-        )
+        # Рисуем рамки
+        _draw_boxes(draw, group_boxes, color, width=3)
         
-        # Добавляем подпись
-        label = f"{category}: {score:.2f}" if score is not None else category
-        draw.text((bbox[0] + 5, bbox[1] + 5), label, fill=color)
+        for i, bbox in zip(indices, group_boxes.tolist()):
+            item = layout_data[i]
+            category = item["category"]
+            score = item.get("score", 1.0)
+            
+            # Добавляем подпись
+            label = f"{category}: {score:.2f}" if score is not None else category
+            draw.text((bbox[0] + 5, bbox[1] + 5), label, fill=color, font=font)
     
     return img
 
 
-def visualize_entities(text, entities, output_path=None, highlight_colors=None):
+def visualize_entities(text, entities, output_path=None, highlight_colors=None, return_html=True,
+                       assume_sorted=False):
     """
     Визуализация найденных именованных сущностей в тексте.
     
@@ -74,12 +289,17 @@ def visualize_entities(text, entities, output_path=None, highlight_colors=None):
         entities (list): Список найденных сущностей
         output_path (str): Путь для сохранения HTML-файла
         highlight_colors (dict): Словарь с цветами для разных типов сущностей
+        return_html (bool): Возвращать ли HTML-код. Если False и указан
+            output_path, страница записывается в файл по частям,
+            без построения HTML-строки в памяти.
+        assume_sorted (bool): Сущности уже упорядочены по start_char
+            (например, получены от EntityExtractor), сортировка не нужна
         
     Returns:
-        str: HTML-код с визуализацией
+        str: HTML-код с визуализацией или None, если return_html=False
     """
     if not entities:
-        return f"<p>{text}</p>"
+        return f"<p>{html.escape(text)}</p>"
         
     # Определяем цвета по умолчанию для типов сущностей
     if highlight_colors is None:
@@ -102,106 +322,132 @@ def visualize_entities(text, entities, output_path=None, highlight_colors=None):
             "MISC": "#ccffff"          # светло-голубой
         }
     
+    # Типы, встречающиеся в тексте, собираются за один проход.
+    # Синонимы (PER и PERSON) дают в легенде один элемент
+    used_labels = {_LABEL_ALIASES.get(entity["label"], entity["label"]) for entity in entities}
+    legend_colors = {}
+    for label, color in highlight_colors.items():
+        label = _LABEL_ALIASES.get(label, label)
+        if label in used_labels:
+            legend_colors.setdefault(label, color)
+            
+    legend = "".join([_legend_span(label, color) for label, color in legend_colors.items()])
+    
     # Сортируем сущности по начальной позиции
-    sorted_entities = sorted(entities, key=lambda x: x["start_char"])
+    if not assume_sorted:
+        entities = sorted(entities, key=itemgetter("start_char"))
+        
+    if output_path and not return_html:
+        with open(output_path, 'w', encoding='utf-8') as f:
+            _write_entities_html(f, text, entities, highlight_colors, legend)
+        return None
+        
+    # Собираем полный HTML
+    buf = io.StringIO()
+    _write_entities_html(buf, text, entities, highlight_colors, legend)
+    result = buf.getvalue()
     
-    # Создаем HTML для визуализации
-    html = []
+    # Сохраняем HTML, если указан путь
+    if output_path:
+        with open(output_path, 'w', encoding='utf-8') as f:
+            f.write(result)
+    
+    return result
+
+
+def _write_entities_html(buf, text, entities, highlight_colors, legend):
+    """
+    Запись HTML-страницы с подсвеченными сущностями в текстовый поток.
+    
+    Args:
+        buf: Текстовый поток (файл или io.StringIO)
+        text (str): Исходный текст
+        entities (list): Сущности, упорядоченные по start_char
+        highlight_colors (dict): Словарь с цветами для разных типов сущностей
+        legend (str): HTML-код легенды
+    """
+    write = buf.write
+    write(_ENTITIES_HTML_HEADER)
+    write(legend)
+    write(_ENTITIES_HTML_MIDDLE)
+    
+    # Текст экранируется один раз, а границы сущностей переводятся
+    # в позиции экранированного текста одной векторной операцией
+    escaped, offsets = _escape_with_offsets(text)
+    bounds = [(entity["start_char"], entity["end_char"]) for entity in entities]
+    if offsets is not None:
+        bounds = np.asarray(bounds, dtype=np.int64).reshape(-1, 2)
+        bounds = offsets[np.clip(bounds, 0, len(text))].tolist()
+        
     last_end = 0
     
-    for entity in sorted_entities:
-        start = entity["start_char"]
-        end = entity["end_char"]
+    # Открывающие теги подсветки формируются один раз для каждого типа и цвета
+    # и переиспользуются между вызовами
+    mark_tags = {}
+    
+    for entity, (start, end) in zip(entities, bounds):
         label = entity["label"]
         
-        # Текст до сущности
-        if start > last_end:
-            html.append(text[last_end:start])
+        # Текст до сущности. Для смежных и перекрывающихся сущностей
+        # срез пуст, поэтому отдельная проверка не нужна
+        write(escaped[last_end:start])
         
         # Определяем цвет для типа сущности
-        color = highlight_colors.get(label, "#cccccc")  # серый по умолчанию
+        mark_tag = mark_tags.get(label)
+        if mark_tag is None:
+            color = highlight_colors.get(label, "#cccccc")  # серый по умолчанию
+            mark_tag = mark_tags[label] = _mark_tag(label, color)
         
         # Отображаем сущность с подсветкой и всплывающей подсказкой
-        entity_text = text[start:end]
-        html.append(f'<mark style="background-color: {color};" title="{label}">{entity_text}</mark>')
+        write(mark_tag)
+        write(escaped[start:end])
+        write('</mark>')
         
         last_end = end
     
     # Добавляем оставшийся текст
-    if last_end < len(text):
-        html.append(text[last_end:])
-    
-    # Собираем полный HTML
-    result = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="UTF-8">
-        <title>Распознанные сущности</title>
-        <style>
-            body {{ font-family: Arial, sans-serif; line-height: 1.6; padding: 20px; }}
-            .legend {{ margin-bottom: 20px; }}
-            .legend span {{ display: inline-block; margin-right: 15px; }}
-            .legend .color-box {{ display: inline-block; width: 15px; height: 15px; margin-right: 5px; vertical-align: middle; }}
-        </style>
-    </head>
-    <body>
-        <div class="legend">
-            <h3>Типы сущностей:</h3>
-            {"".join([f'<span><span class="color-box" style="background-color: {color};"></span>{label}</span>' for label, color in highlight_colors.items() if any(e["label"] == label for e in entities)])}
-        </div>
-        <div class="text">
-            {"".join(html)}
-        </div>
-    </body>
-    </html>
-    """
-    
-    # Сохраняем HTML, если указан путь
-    if output_path:
-        with open(output_path, 'w', encoding='utf-8') as f:
-            f.write(result)
-    
-    return result
+    write(escaped[last_end:])
+    write(_ENTITIES_HTML_FOOTER)
 
 
-def visualize_table(df, output_path=None):
+def visualize_table(df, output_path=None, return_html=True):
     """
     Визуализация таблицы в виде HTML.
     
     Args:
         df (pandas.DataFrame): Таблица для визуализации
         output_path (str): Путь для сохранения HTML-файла
+        return_html (bool): Возвращать ли HTML-код. Если False и указан
+            output_path, таблица записывается в файл напрямую,
+            без построения HTML-строки в памяти.
         
     Returns:
-        str: HTML-код с таблицей
-    """
-    table_html = df.to_html(classes='dataframe', border=1, index=False)
-    
-    result = f"""
-    <!DOCTYPE html>
-    <html>
-    <head>
-        <meta charset="UTF-8">
-        <title>Таблица</title>
-        <style>
-            body {{ font-family: Arial, sans-serif; padding: 20px; }}
-            table.dataframe {{ border-collapse: collapse; margin: 10px 0; width: 100%; }}
-            table.dataframe th {{ background-color: #f2f2f2; }}
-            table.dataframe th, table.dataframe td {{ border: 1px solid #ddd; padding: 8px; text-align: left; }}
-            table.dataframe tr:nth-child(even) {{ background-color: #f9f9f9; }}
-            table.dataframe tr:hover {{ background-color: #f2f2f2; }}
-        </style>
-    </head>
-    <body>
-        <h2>Извлеченная таблица</h2>
-        {table_html}
-    </body>
-    </html>
+        str: HTML-код с таблицей или None, если return_html=False
     """
+    if output_path and not return_html:
+        with open(output_path, 'w', encoding='utf-8') as f:
+            _write_table_html(df, f)
+        return None
+        
+    buf = io.StringIO()
+    _write_table_html(df, buf)
+    result = buf.getvalue()
     
     if output_path:
         with open(output_path, 'w', encoding='utf-8') as f:
             f.write(result)
     
-    return result 
\ No newline at end of file
+    return result
+
+
+def _write_table_html(df, buf):
+    """
+    Запись HTML-страницы с таблицей в текстовый поток.
+    
+    Args:
+        df (pandas.DataFrame): Таблица для визуализации
+        buf: Текстовый поток (файл или io.StringIO)
+    """
+    buf.write(_TABLE_HTML_HEADER)
+    df.to_html(buf=buf, classes='dataframe', border=1, index=False)
+    buf.write(_TABLE_HTML_FOOTER) 
\ No newline at end of file
@@ -3,13 +3,13 @@
 
 from setuptools import setup, find_packages
 import os
+import re
+
+VERSION_RE = re.compile(r'^__version__\s*=\s*["\']([^"\']+)["\']', re.M)
 
 # Чтение версии из файла __init__.py
 with open(os.path.join("pdfml", "__init__.py"), "r", encoding="utf-8") as f:
-    for line in f:
-        if line.startswith("__version__"):
-            version = line.split("=")[1].strip().strip('"').strip("'")
-            break
+    version = VERSION_RE.search(f.read()).group(1)
 
 # Чтение README.md для длинного описания
 with open("README.md", "r", encoding="utf-8") as f:
@@ -30,6 +30,12 @@ setup(
     url="https://github.com/author/pdfml",
     packages=find_packages(),
     install_requires=requirements,
+    # Необязательные зависимости: ускоренные реализации и дополнительные движки.
+    # Без них используются встроенные запасные варианты
+    extras_require={
+        "fast": ["orjson", "numba", "tesserocr"],
+        "pdfplumber": ["pdfplumber"],
+    },
     classifiers=[
         "Development Status :: 3 - Alpha",
         "Intended Audience :: Developers",